@@ -4,6 +4,7 @@ import pandas as pd
 import numpy as np
 import re
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 import openai
 from openai import OpenAI
 import plotly.express as px
@@ -12,25 +13,38 @@ from plotly.subplots import make_subplots
 from sklearn.linear_model import LinearRegression
 from scipy import stats
 
-from database import get_products, get_price_history, get_settings, get_product
+from database import (
+    get_products, get_price_history, get_price_histories, get_settings, get_product,
+    add_analysis_batch, get_analysis_batch, update_analysis_batch
+)
 
 # Set up OpenAI API key
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+
+# Failed OpenAI requests are retried with exponential backoff, and a stuck request
+# gives up after the timeout (seconds) instead of blocking the page indefinitely
+OPENAI_MAX_RETRIES = 3
+OPENAI_TIMEOUT = 60
+
 openai_client = None
 if OPENAI_API_KEY:
     try:
-        openai_client = OpenAI(api_key=OPENAI_API_KEY)
+        openai_client = OpenAI(api_key=OPENAI_API_KEY, max_retries=OPENAI_MAX_RETRIES, timeout=OPENAI_TIMEOUT)
     except Exception as e:
         print(f"Error initializing OpenAI client: {e}")
 
+# Maximum number of product analyses requested from OpenAI at the same time
+BULK_ANALYSIS_WORKERS = 10
+
 # AI Analysis functions
-def prepare_price_data(product_id, days=None):
+def prepare_price_data(product_id, days=None, price_history=None):
     """
     Prepare price data for a product for AI analysis
     
     Args:
         product_id (int): Product ID
         days (int, optional): Number of days of history to include
+        price_history (DataFrame, optional): Already fetched price history for the period
     
     Returns:
         dict: Structured price data
@@ -41,7 +55,8 @@ def prepare_price_data(product_id, days=None):
         return None
     
     # Get price history
-    price_history = get_price_history(product_id, days)
+    if price_history is None:
+        price_history = get_price_history(product_id, days)
     if price_history.empty:
         return None
     
@@ -75,23 +90,16 @@ def prepare_price_data(product_id, days=None):
     
     # Check if we have competitor prices
     if 'competitor_prices' in price_history.columns:
-        competitors = set()
-        
-        # Get all competitor names
-        for idx, row in price_history.iterrows():
-            if isinstance(row['competitor_prices'], dict):
-                competitors.update(row['competitor_prices'].keys())
+        # Collect every competitor's prices in one pass over the history
+        prices_by_competitor = {}
+        for prices in price_history['competitor_prices'].to_numpy():
+            if isinstance(prices, dict):
+                for competitor, price in prices.items():
+                    if price and isinstance(price, (int, float)):
+                        prices_by_competitor.setdefault(competitor, []).append(price)
         
         # Calculate stats for each competitor
-        for competitor in competitors:
-            competitor_prices = []
-            
-            for idx, row in price_history.iterrows():
-                if isinstance(row['competitor_prices'], dict) and competitor in row['competitor_prices']:
-                    price = row['competitor_prices'][competitor]
-                    if price and isinstance(price, (int, float)):
-                        competitor_prices.append(price)
-            
+        for competitor, competitor_prices in prices_by_competitor.items():
             if competitor_prices:
                 competitor_stats[competitor] = {
                     "min": min(competitor_prices),
@@ -180,50 +188,8 @@ def simple_price_analysis(data, product_id=None):
         "recommendation": recommendation
     }
 
-def analyze_price_data(data, product_id=None):
-    """
-    Analyze price data using OpenAI's GPT-4o model
-    
-    Args:
-        data (dict): Structured price data
-        product_id (int, optional): Product ID for thresholds
-    
-    Returns:
-        dict: Analysis results
-    """
-    if not data:
-        return {
-            "product_id": product_id,
-            "error": "No data available for analysis"
-        }
-    
-    # Check for API key
-    if not OPENAI_API_KEY:
-        return {
-            "product_id": data["product_id"],
-            "product_name": data["product_name"],
-            "error": "OpenAI API key is not set"
-        }
-    
-    # Get price thresholds
-    settings = get_settings()
-    try:
-        min_threshold = float(settings.get("global_min_price_threshold", -5))
-        max_threshold = float(settings.get("global_max_price_threshold", 15))
-    except (ValueError, TypeError):
-        min_threshold = -5.0
-        max_threshold = 15.0
-    
-    # Calculate price constraints
-    current_price = float(data["our_price_stats"]["current"])
-    min_allowed_price = current_price + min_threshold
-    max_allowed_price = current_price + max_threshold
-    
-    try:
-        # Prepare a simple prompt with clear JSON structure expectation
-        prompt = """
-You are an expert in e-commerce pricing analysis. Based on the data below, provide a pricing analysis and recommendation.
-
+# Per-product section of the analysis prompt
+PRODUCT_PROMPT = """
 PRODUCT DATA:
 - Product: {product_name}
 - Period: {start_date} to {end_date}
@@ -238,123 +204,323 @@ CONSTRAINTS:
 - Current price: {current_price}
 - Minimum allowed price: {min_price} ({min_threshold}€ from current)
 - Maximum allowed price: {max_price} ({max_threshold}€ from current)
+"""
 
+ANALYSIS_REQUIREMENTS = """
 ANALYSIS REQUIREMENTS:
 1. Analyze our position compared to competitors
 2. Identify price trends
 3. Provide specific recommendations
 4. Suggest an optimal price within the allowed range
 5. Explain the rationale for the price recommendation
+"""
 
-FORMAT YOUR RESPONSE AS VALID JSON WITH THESE FIELDS:
-- market_position: analysis of our position in the market
+ANALYSIS_FIELDS = """- market_position: analysis of our position in the market
 - price_trends: analysis of price trends
 - competitive_analysis: analysis of competitor pricing strategies
 - recommendations: actionable pricing recommendations
-- suggested_price: a number between {min_price} and {max_price}
+- suggested_price: {suggested_price}
 - rationale: explanation for the suggested price
 """
 
-        # Format the prompt with our data
-        competitor_data_str = ""
-        for competitor, stats in data["competitor_stats"].items():
-            competitor_data_str += f"- {competitor}: current {stats.get('current', 'N/A')}, "
-            competitor_data_str += f"avg {stats.get('avg', 'N/A')}, "
-            competitor_data_str += f"range {stats.get('min', 'N/A')} to {stats.get('max', 'N/A')}\n"
+# Number of products sent to OpenAI in a single bulk analysis request
+ANALYSIS_BATCH_SIZE = 8
 
-        formatted_prompt = prompt.format(
-            product_name=data["product_name"],
-            start_date=data["date_range"]["start"],
-            end_date=data["date_range"]["end"],
-            our_current=data["our_price_stats"]["current"],
-            our_min=data["our_price_stats"]["min"],
-            our_max=data["our_price_stats"]["max"],
-            our_avg=data["our_price_stats"]["avg"],
-            competitor_data=competitor_data_str,
-            current_price=current_price,
-            min_price=min_allowed_price,
-            max_price=max_allowed_price,
-            min_threshold=min_threshold,
-            max_threshold=max_threshold
-        )
+def _get_price_thresholds():
+    """
+    Get the global price change thresholds from the settings
+    
+    Returns:
+        tuple: (min_threshold, max_threshold) in euros from the current price
+    """
+    settings = get_settings()
+    try:
+        min_threshold = float(settings.get("global_min_price_threshold", -5))
+        max_threshold = float(settings.get("global_max_price_threshold", 15))
+    except (ValueError, TypeError):
+        min_threshold = -5.0
+        max_threshold = 15.0
+    
+    return min_threshold, max_threshold
+
+def _format_product_prompt(data, min_threshold, max_threshold):
+    """
+    Fill in the prompt section describing one product
+    
+    Args:
+        data (dict): Structured price data
+        min_threshold (float): Maximum price decrease allowed
+        max_threshold (float): Maximum price increase allowed
+    
+    Returns:
+        tuple: (prompt section, min allowed price, max allowed price)
+    """
+    # Calculate price constraints
+    current_price = float(data["our_price_stats"]["current"])
+    min_allowed_price = current_price + min_threshold
+    max_allowed_price = current_price + max_threshold
+    
+    competitor_data_str = ""
+    for competitor, stats in data["competitor_stats"].items():
+        competitor_data_str += f"- {competitor}: current {stats.get('current', 'N/A')}, "
+        competitor_data_str += f"avg {stats.get('avg', 'N/A')}, "
+        competitor_data_str += f"range {stats.get('min', 'N/A')} to {stats.get('max', 'N/A')}\n"
+    
+    section = PRODUCT_PROMPT.format(
+        product_name=data["product_name"],
+        start_date=data["date_range"]["start"],
+        end_date=data["date_range"]["end"],
+        our_current=data["our_price_stats"]["current"],
+        our_min=data["our_price_stats"]["min"],
+        our_max=data["our_price_stats"]["max"],
+        our_avg=data["our_price_stats"]["avg"],
+        competitor_data=competitor_data_str,
+        current_price=current_price,
+        min_price=min_allowed_price,
+        max_price=max_allowed_price,
+        min_threshold=min_threshold,
+        max_threshold=max_threshold
+    )
+    
+    return section, min_allowed_price, max_allowed_price
+
+def _format_ai_results(data, result_json):
+    """
+    Turn the JSON analysis returned by OpenAI into our analysis results
+    
+    Args:
+        data (dict): Structured price data the analysis was requested for
+        result_json (dict): Parsed analysis of this product
+    
+    Returns:
+        dict: Analysis results
+    """
+    results = {
+        "product_id": data["product_id"],
+        "product_name": data["product_name"],
+        "current_price": data["our_price_stats"]["current"],
+        "average_competitor_price": data["average_competitor_price"],
+        "lowest_competitor_price": min([stats.get("current", float('inf')) for stats in data["competitor_stats"].values()]) if data["competitor_stats"] else None,
+        "highest_competitor_price": max([stats.get("current", 0) for stats in data["competitor_stats"].values()]) if data["competitor_stats"] else None,
+        "price_change_percentage": data["our_price_stats"]["change_percentage"],
+        "suggested_price": result_json.get("suggested_price"),
+        "price_difference": data["price_difference"],
+        "price_difference_percentage": data["price_difference_percentage"]
+    }
+
+    # Determine price position
+    if data["average_competitor_price"] > 0:
+        price_diff_pct = data["price_difference_percentage"]
+        if price_diff_pct > 3:
+            results["price_position"] = "above market"
+        elif price_diff_pct < -3:
+            results["price_position"] = "below market"
+        else:
+            results["price_position"] = "at market"
+    else:
+        results["price_position"] = "unknown"
+
+    # Add the analysis parts
+    results["market_analysis"] = result_json.get("market_position", "")
+    results["trend_analysis"] = result_json.get("price_trends", "")
+    results["competitor_analysis"] = result_json.get("competitive_analysis", "")
+    results["recommendation"] = result_json.get("recommendations", "")
+    results["reasoning"] = result_json.get("rationale", "")
+
+    # Create concise versions for display
+    results["short_recommendation"] = results["recommendation"].split('.')[0] + '.' if results["recommendation"] else ""
+
+    # Add any useful tips
+    tips = []
+    if results.get("price_position") == "above market" and data["price_difference_percentage"] > 10:
+        tips.append("Your price is significantly higher than competitors. Consider a tiered approach to gradual price reductions.")
+    elif results.get("price_position") == "below market" and data["price_difference_percentage"] < -10:
+        tips.append("Your price is significantly lower than competitors. You may be leaving money on the table.")
+
+    if tips:
+        results["tips"] = " ".join(tips)
+
+    return results
+
+def _build_chat_request(prompt):
+    """
+    Build the Chat Completions request body shared by every analysis request
+    
+    Args:
+        prompt (str): User prompt
+    
+    Returns:
+        dict: Request parameters (model, messages, response format, temperature)
+    """
+    # The newest OpenAI model is "gpt-4o" which was released May 13, 2024
+    return {
+        "model": "gpt-4o",
+        "messages": [
+            {"role": "system", "content": "You are a pricing analyst AI. Provide analysis and recommendations in JSON format."},
+            {"role": "user", "content": prompt}
+        ],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.2
+    }
 
+def _build_analysis_request(data, min_threshold, max_threshold):
+    """
+    Build the Chat Completions request body for analyzing one product
+    
+    Args:
+        data (dict): Structured price data
+        min_threshold (float): Maximum price decrease allowed
+        max_threshold (float): Maximum price increase allowed
+    
+    Returns:
+        dict: Request parameters (model, messages, response format, temperature)
+    """
+    # Prepare a simple prompt with clear JSON structure expectation
+    product_section, min_allowed_price, max_allowed_price = _format_product_prompt(data, min_threshold, max_threshold)
+    
+    formatted_prompt = (
+        "\nYou are an expert in e-commerce pricing analysis. Based on the data below, provide a pricing analysis and recommendation.\n"
+        + product_section
+        + ANALYSIS_REQUIREMENTS
+        + "\nFORMAT YOUR RESPONSE AS VALID JSON WITH THESE FIELDS:\n"
+        + ANALYSIS_FIELDS.format(suggested_price=f"a number between {min_allowed_price} and {max_allowed_price}")
+    )
+    
+    return _build_chat_request(formatted_prompt)
+
+def analyze_price_data(data, product_id=None):
+    """
+    Analyze price data using OpenAI's GPT-4o model
+    
+    Args:
+        data (dict): Structured price data
+        product_id (int, optional): Product ID for thresholds
+    
+    Returns:
+        dict: Analysis results
+    """
+    if not data:
+        return {
+            "product_id": product_id,
+            "error": "No data available for analysis"
+        }
+    
+    # Check for API key
+    if not OPENAI_API_KEY:
+        return {
+            "product_id": data["product_id"],
+            "product_name": data["product_name"],
+            "error": "OpenAI API key is not set"
+        }
+    
+    # Get price thresholds
+    min_threshold, max_threshold = _get_price_thresholds()
+    
+    try:
         # Call the OpenAI API
-        # The newest OpenAI model is "gpt-4o" which was released May 13, 2024
         response = openai_client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "You are a pricing analyst AI. Provide analysis and recommendations in JSON format."},
-                {"role": "user", "content": formatted_prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.2,
+            **_build_analysis_request(data, min_threshold, max_threshold)
         )
 
         # Parse the response
         result_json = json.loads(response.choices[0].message.content)
 
         # Format results for our use
-        results = {
-            "product_id": data["product_id"],
-            "product_name": data["product_name"],
-            "current_price": data["our_price_stats"]["current"],
-            "average_competitor_price": data["average_competitor_price"],
-            "lowest_competitor_price": min([stats.get("current", float('inf')) for stats in data["competitor_stats"].values()]) if data["competitor_stats"] else None,
-            "highest_competitor_price": max([stats.get("current", 0) for stats in data["competitor_stats"].values()]) if data["competitor_stats"] else None,
-            "price_change_percentage": data["our_price_stats"]["change_percentage"],
-            "suggested_price": result_json.get("suggested_price"),
-            "price_difference": data["price_difference"],
-            "price_difference_percentage": data["price_difference_percentage"]
-        }
-
-        # Determine price position
-        if data["average_competitor_price"] > 0:
-            price_diff_pct = data["price_difference_percentage"]
-            if price_diff_pct > 3:
-                results["price_position"] = "above market"
-            elif price_diff_pct < -3:
-                results["price_position"] = "below market"
-            else:
-                results["price_position"] = "at market"
-        else:
-            results["price_position"] = "unknown"
+        return _format_ai_results(data, result_json)
 
-        # Add the analysis parts
-        results["market_analysis"] = result_json.get("market_position", "")
-        results["trend_analysis"] = result_json.get("price_trends", "")
-        results["competitor_analysis"] = result_json.get("competitive_analysis", "")
-        results["recommendation"] = result_json.get("recommendations", "")
-        results["reasoning"] = result_json.get("rationale", "")
-
-        # Create concise versions for display
-        results["short_recommendation"] = results["recommendation"].split('.')[0] + '.' if results["recommendation"] else ""
+    except Exception as e:
+        print(f"Error analyzing price data: {str(e)}")
+        # Fallback to simple analysis
+        simple_results = simple_price_analysis(data, product_id)
+        simple_results["error"] = f"AI analysis error: {str(e)}"
+        return simple_results
 
-        # Add any useful tips
-        tips = []
-        if results.get("price_position") == "above market" and data["price_difference_percentage"] > 10:
-            tips.append("Your price is significantly higher than competitors. Consider a tiered approach to gradual price reductions.")
-        elif results.get("price_position") == "below market" and data["price_difference_percentage"] < -10:
-            tips.append("Your price is significantly lower than competitors. You may be leaving money on the table.")
+def analyze_price_data_batch(data_list):
+    """
+    Analyze several products with a single OpenAI request
+    
+    The instructions are sent once for the whole batch and the model replies with
+    one analysis per product, in the order the products were given.
+    
+    Args:
+        data_list (list): Structured price data of each product
+    
+    Returns:
+        list: Analysis results, in the same order as data_list
+    """
+    if not OPENAI_API_KEY:
+        return [{
+            "product_id": data["product_id"],
+            "product_name": data["product_name"],
+            "error": "OpenAI API key is not set"
+        } for data in data_list]
+    
+    # Get price thresholds
+    min_threshold, max_threshold = _get_price_thresholds()
+    
+    try:
+        # One numbered section per product, followed by the shared instructions
+        product_sections = ""
+        for index, data in enumerate(data_list, start=1):
+            section, _, _ = _format_product_prompt(data, min_threshold, max_threshold)
+            product_sections += f"\n=== PRODUCT {index} (product_id {data['product_id']}) ===\n{section}"
+        
+        formatted_prompt = (
+            f"\nYou are an expert in e-commerce pricing analysis. Based on the data below, provide a pricing analysis and recommendation for each of the {len(data_list)} products.\n"
+            + product_sections
+            + ANALYSIS_REQUIREMENTS
+            + "\nFORMAT YOUR RESPONSE AS VALID JSON WITH A SINGLE FIELD \"analyses\": a list with one object per product, "
+            + "in the same order as the products above. Each object has these fields:\n"
+            + "- product_id: the product_id given for the product\n"
+            + ANALYSIS_FIELDS.format(suggested_price="a number between the product's minimum and maximum allowed price")
+        )
 
-        if tips:
-            results["tips"] = " ".join(tips)
+        # Call the OpenAI API
+        response = openai_client.chat.completions.create(**_build_chat_request(formatted_prompt))
 
+        # Parse the response and match the analyses back to their products
+        analyses = json.loads(response.choices[0].message.content).get("analyses", [])
+        analyses_by_id = {}
+        for analysis in analyses:
+            try:
+                analyses_by_id[int(analysis.get("product_id"))] = analysis
+            except (TypeError, ValueError):
+                continue
+        
+        results = []
+        for index, data in enumerate(data_list):
+            result_json = analyses_by_id.get(int(data["product_id"]))
+            if result_json is None and len(analyses) == len(data_list):
+                # Fall back to the position when the model left out the product ID
+                result_json = analyses[index]
+            
+            if result_json is None:
+                simple_results = simple_price_analysis(data, data["product_id"])
+                simple_results["error"] = "AI analysis error: product missing from the batch response"
+                results.append(simple_results)
+            else:
+                results.append(_format_ai_results(data, result_json))
+        
         return results
 
     except Exception as e:
-        print(f"Error analyzing price data: {str(e)}")
+        print(f"Error analyzing price data batch: {str(e)}")
         # Fallback to simple analysis
-        simple_results = simple_price_analysis(data, product_id)
-        simple_results["error"] = f"AI analysis error: {str(e)}"
-        return simple_results
+        results = []
+        for data in data_list:
+            simple_results = simple_price_analysis(data, data["product_id"])
+            simple_results["error"] = f"AI analysis error: {str(e)}"
+            results.append(simple_results)
+        return results
 
-def get_price_analysis(product_id, days=None):
+def get_price_analysis(product_id, days=None, price_history=None):
     """
     Get AI price analysis for a product
     
     Args:
         product_id (int): Product ID
         days (int, optional): Number of days of history to include
+        price_history (DataFrame, optional): Already fetched price history for the period
     
     Returns:
         dict: Analysis results
@@ -365,7 +531,7 @@ def get_price_analysis(product_id, days=None):
         days = settings.get("analysis_period", 7)
     
     # Prepare data
-    data = prepare_price_data(product_id, days)
+    data = prepare_price_data(product_id, days, price_history)
     
     if not data:
         return {
@@ -384,32 +550,309 @@ def get_price_analysis(product_id, days=None):
             "error": f"Analysis error: {str(e)}"
         }
 
-def get_bulk_analysis(days=None):
+def _prepare_bulk_price_data(days=None, product_ids=None):
     """
-    Get AI price analysis for all products
+    Prepare the price data of all products, or only the given ones, for a bulk analysis
     
     Args:
         days (int, optional): Number of days of history to include
+        product_ids (list, optional): Only prepare these product IDs
     
     Returns:
-        list: List of analysis results for each product
+        tuple: (days, list with the price data of each product, or an error result if it could not be prepared)
     """
     # Get all products
     products_df = get_products()
     
-    results = []
+    # Restrict to the requested products before running any analysis
+    if product_ids is not None:
+        products_df = products_df[products_df['id'].isin(product_ids)]
+    
+    # Resolve the period once so every product is analyzed over the same window
+    if days is None:
+        settings = get_settings()
+        days = settings.get("analysis_period", 7)
     
-    for _, product in products_df.iterrows():
-        product_id = product['id']
+    # Fetch the price history of every product in one query
+    product_ids = products_df['id'].tolist()
+    histories_df = get_price_histories(product_ids, days)
+    histories = {
+        int(product_id): history.reset_index(drop=True)
+        for product_id, history in histories_df.groupby('product_id')
+    } if not histories_df.empty else {}
+    
+    # Prepare the price data of every product; failures are reported in their own result
+    prepared = []
+    for product_id in product_ids:
+        try:
+            data = prepare_price_data(product_id, days, histories.get(product_id, pd.DataFrame()))
+        except Exception as e:
+            prepared.append({
+                "product_id": product_id,
+                "error": f"Error analyzing product: {str(e)}"
+            })
+            continue
         
-        # Get analysis for the product
-        analysis = get_price_analysis(product_id, days)
-        results.append(analysis)
+        if not data:
+            prepared.append({
+                "product_id": product_id,
+                "error": "Product not found"
+            })
+        else:
+            prepared.append(data)
+    
+    return days, prepared
+
+def get_bulk_analysis(days=None, product_ids=None):
+    """
+    Get AI price analysis for all products, or only the given ones
+    
+    Args:
+        days (int, optional): Number of days of history to include
+        product_ids (list, optional): Only analyze these product IDs
+    
+    Returns:
+        list: List of analysis results for each product
+    """
+    days, prepared = _prepare_bulk_price_data(days, product_ids)
+    
+    # Products whose data could not be prepared keep their error result
+    results = list(prepared)
+    pending = [(index, data) for index, data in enumerate(prepared) if "error" not in data]
+    
+    # Send the products to OpenAI in batches, so the instructions are only paid for once per batch
+    batches = [pending[i:i + ANALYSIS_BATCH_SIZE] for i in range(0, len(pending), ANALYSIS_BATCH_SIZE)]
+    
+    # Each batch waits on an OpenAI request, so run them on a bounded thread pool
+    with ThreadPoolExecutor(max_workers=BULK_ANALYSIS_WORKERS) as executor:
+        batch_results = executor.map(
+            lambda batch: analyze_price_data_batch([data for _, data in batch]),
+            batches
+        )
+        for batch, analyses in zip(batches, batch_results):
+            for (index, _), analysis in zip(batch, analyses):
+                results[index] = analysis
     
     return results
 
+def submit_analysis_batch(product_ids=None, days=None):
+    """
+    Submit an analysis of all products, or only the given ones, to the OpenAI Batch API
+    
+    Batches are processed asynchronously within 24 hours at half the price of regular
+    requests, which suits overnight refreshes. Use check_analysis_batch to collect the results.
+    
+    Args:
+        product_ids (list, optional): Only analyze these product IDs
+        days (int, optional): Number of days of history to include
+    
+    Returns:
+        dict: Batch ID, status and number of products submitted, or an error
+    """
+    if not OPENAI_API_KEY:
+        return {"error": "OpenAI API key is not set"}
+    
+    days, prepared = _prepare_bulk_price_data(days, product_ids)
+    prepared = [data for data in prepared if "error" not in data]
+    
+    if not prepared:
+        return {"error": "No price data available for analysis"}
+    
+    # Get price thresholds
+    min_threshold, max_threshold = _get_price_thresholds()
+    
+    # One request per product, identified by its product ID
+    lines = [
+        json.dumps({
+            "custom_id": str(data["product_id"]),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _build_analysis_request(data, min_threshold, max_threshold)
+        })
+        for data in prepared
+    ]
+    
+    try:
+        batch_file = openai_client.files.create(
+            file=("price_analysis_batch.jsonl", "\n".join(lines).encode("utf-8")),
+            purpose="batch"
+        )
+        batch = openai_client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+    except Exception as e:
+        print(f"Error submitting analysis batch: {str(e)}")
+        return {"error": f"Error submitting analysis batch: {str(e)}"}
+    
+    product_ids = [data["product_id"] for data in prepared]
+    # Keep the data the prompts were built from, so the results are combined with what the model saw
+    add_analysis_batch(batch.id, product_ids, days, batch.status, price_data=prepared)
+    
+    return {
+        "batch_id": batch.id,
+        "status": batch.status,
+        "product_count": len(product_ids)
+    }
+
+def check_analysis_batch(batch_id):
+    """
+    Check an analysis batch and collect its results once OpenAI has completed it
+    
+    Args:
+        batch_id (str): OpenAI batch ID
+    
+    Returns:
+        dict: Batch status, and the analysis results of each product once completed
+    """
+    # Results that were already collected are served from the database
+    record = get_analysis_batch(batch_id)
+    if record and record["results"] is not None:
+        return {"batch_id": batch_id, "status": record["status"], "results": record["results"]}
+    
+    if not OPENAI_API_KEY:
+        return {"batch_id": batch_id, "error": "OpenAI API key is not set"}
+    
+    try:
+        batch = openai_client.batches.retrieve(batch_id)
+    except Exception as e:
+        return {"batch_id": batch_id, "error": f"Error checking analysis batch: {str(e)}"}
+    
+    if batch.status != "completed" or not batch.output_file_id:
+        update_analysis_batch(batch_id, batch.status)
+        return {"batch_id": batch_id, "status": batch.status, "results": None}
+    
+    # Parse the analysis of each product from the output file
+    try:
+        output = openai_client.files.content(batch.output_file_id).text
+    except Exception as e:
+        return {"batch_id": batch_id, "error": f"Error downloading batch results: {str(e)}"}
+    
+    analyses = {}
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        try:
+            entry = json.loads(line)
+            content = entry["response"]["body"]["choices"][0]["message"]["content"]
+            analyses[int(entry["custom_id"])] = json.loads(content)
+        except (KeyError, IndexError, TypeError, ValueError):
+            continue
+    
+    # Combine the answers with the price data they were requested for
+    # (batches recorded before the submitted data was stored fall back to the current data)
+    if record and record.get("price_data"):
+        prepared = record["price_data"]
+    else:
+        product_ids = record["product_ids"] if record else list(analyses)
+        days, prepared = _prepare_bulk_price_data(record["days"] if record else None, product_ids)
+    
+    results = []
+    for data in prepared:
+        if "error" in data:
+            results.append(data)
+        elif data["product_id"] in analyses:
+            results.append(_format_ai_results(data, analyses[data["product_id"]]))
+        else:
+            simple_results = simple_price_analysis(data, data["product_id"])
+            simple_results["error"] = "AI analysis error: product missing from the batch results"
+            results.append(simple_results)
+    
+    update_analysis_batch(batch_id, batch.status, results)
+    
+    return {"batch_id": batch_id, "status": batch.status, "results": results}
+
+# WebGL only pays off on large series, and browsers limit how many WebGL contexts a page can hold
+WEBGL_MIN_POINTS = 500
+
+def webgl_render_mode(n_points):
+    """
+    Pick the plotly express render mode for a series
+    
+    Args:
+        n_points (int): Number of points in the series
+    
+    Returns:
+        str: 'webgl' for large series, 'auto' otherwise
+    """
+    return 'webgl' if n_points > WEBGL_MIN_POINTS else 'auto'
+
+def scatter_trace(n_points, **kwargs):
+    """
+    Build a scatter trace, using WebGL (Scattergl) only for large series
+    
+    Args:
+        n_points (int): Number of points in the trace
+        **kwargs: Trace properties
+    
+    Returns:
+        go.Scatter or go.Scattergl: The trace
+    """
+    if n_points > WEBGL_MIN_POINTS:
+        return go.Scattergl(**kwargs)
+    return go.Scatter(**kwargs)
+
+def _lttb_indices(x, y, n_out):
+    """
+    Pick the row positions to keep with Largest-Triangle-Three-Buckets
+    
+    Args:
+        x (ndarray): Numeric x values (sorted)
+        y (ndarray): Numeric y values
+        n_out (int): Number of points to keep
+        
+    Returns:
+        ndarray: Positions of the kept points
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    # First and last points are always kept, the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    kept = np.empty(n_out, dtype=int)
+    kept[0] = a = 0
+    
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        
+        # Keep the point forming the largest triangle with the last kept point
+        # and the average of the next bucket
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        kept[i + 1] = a
+    
+    kept[-1] = n - 1
+    return kept
+
+def downsample_price_history(price_history_df, max_points=1000, threshold=2000):
+    """
+    Thin out a long price history so charts don't plot more points than pixels
+    
+    Args:
+        price_history_df (DataFrame): Price history data
+        max_points (int): Number of records to keep when downsampling
+        threshold (int): Only downsample histories longer than this
+        
+    Returns:
+        DataFrame: The price history, or a subset of its records
+    """
+    if len(price_history_df) <= threshold:
+        return price_history_df
+    
+    # Our price drives the bucket selection; competitor prices follow the kept records
+    history = price_history_df.sort_values('timestamp')
+    x = pd.to_datetime(history['timestamp']).to_numpy().astype('datetime64[ns]').astype(np.int64).astype(float)
+    y = pd.to_numeric(history['our_price'], errors='coerce').ffill().bfill().fillna(0).to_numpy(dtype=float)
+    
+    return history.iloc[_lttb_indices(x, y, max_points)].copy()
+
 # Visualization functions
-def create_price_history_chart(price_history_df, product_name, view_mode="line"):
+def create_price_history_chart(price_history_df, product_name, view_mode="line", compact=False):
     """
     Create an enhanced price history visualization
     
@@ -417,6 +860,7 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
         price_history_df (DataFrame): Price history data
         product_name (str): Name of the product
         view_mode (str): Visualization type ('line', 'area', 'bar', 'candlestick')
+        compact (bool): Build a small chart with tight margins for grids
         
     Returns:
         plotly.graph_objects.Figure: Plotly figure object
@@ -443,18 +887,21 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
     # Create a list to hold all competitor DataFrames
     all_prices = [our_prices_df]
     
-    # Extract competitor prices
+    # Extract competitor prices (columns pulled out as arrays once instead of row by row)
     competitor_dfs = []
     
-    for idx, row in price_history_df.iterrows():
-        if 'competitor_prices' in row and isinstance(row['competitor_prices'], dict):
-            for competitor, price in row['competitor_prices'].items():
-                if isinstance(price, (int, float)):
-                    competitor_dfs.append({
-                        'Date': row['timestamp'],
-                        'Price': price,
-                        'Source': competitor
-                    })
+    if 'competitor_prices' in price_history_df.columns:
+        timestamps = price_history_df['timestamp'].to_numpy()
+        competitor_prices = price_history_df['competitor_prices'].to_numpy()
+        for timestamp, prices in zip(timestamps, competitor_prices):
+            if isinstance(prices, dict):
+                for competitor, price in prices.items():
+                    if isinstance(price, (int, float)):
+                        competitor_dfs.append({
+                            'Date': timestamp,
+                            'Price': price,
+                            'Source': competitor
+                        })
     
     # Create a DataFrame for all competitor prices
     if competitor_dfs:
@@ -464,6 +911,10 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
     # Combine all prices into a single DataFrame
     combined_df = pd.concat(all_prices, ignore_index=True)
     
+    # Size the chart up front instead of adjusting the layout afterwards
+    height = 300 if compact else None
+    margin = dict(l=20, r=20, t=30, b=20) if compact else dict(l=40, r=40, t=60, b=40)
+    
     # Handle different view modes
     if view_mode == "line":
         # Line chart
@@ -474,7 +925,8 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
             color='Source',
             title=f'Price History for {product_name}',
             labels={'Price': 'Price (€)', 'Date': 'Date', 'Source': 'Source'},
-            template='plotly_white'
+            template='plotly_white',
+            render_mode=webgl_render_mode(len(combined_df))
         )
         
         # Improve layout
@@ -486,7 +938,8 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
                 xanchor="right",
                 x=1
             ),
-            margin=dict(l=40, r=40, t=60, b=40),
+            margin=margin,
+            height=height,
             hovermode="x unified"
         )
         
@@ -524,7 +977,8 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
                 xanchor="right",
                 x=1
             ),
-            margin=dict(l=40, r=40, t=60, b=40),
+            margin=margin,
+            height=height,
             hovermode="x unified"
         )
     
@@ -550,7 +1004,8 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
                 xanchor="right",
                 x=1
             ),
-            margin=dict(l=40, r=40, t=60, b=40),
+            margin=margin,
+            height=height,
             hovermode="x unified"
         )
     
@@ -570,11 +1025,11 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
         
         # Create candlestick chart
         fig = go.Figure(data=[go.Candlestick(
-            x=ohlc['Date'],
-            open=ohlc['Open'],
-            high=ohlc['High'],
-            low=ohlc['Low'],
-            close=ohlc['Close'],
+            x=ohlc['Date'].to_numpy(),
+            open=ohlc['Open'].to_numpy(),
+            high=ohlc['High'].to_numpy(),
+            low=ohlc['Low'].to_numpy(),
+            close=ohlc['Close'].to_numpy(),
             name='Our Price'
         )])
         
@@ -582,9 +1037,10 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
         for competitor in combined_df['Source'].unique():
             if competitor != 'Our Price':
                 comp_df = combined_df[combined_df['Source'] == competitor]
-                fig.add_trace(go.Scatter(
-                    x=comp_df['Date'],
-                    y=comp_df['Price'],
+                fig.add_trace(scatter_trace(
+                    len(comp_df),
+                    x=comp_df['Date'].to_numpy(),
+                    y=comp_df['Price'].to_numpy(),
                     mode='markers',
                     name=competitor
                 ))
@@ -602,7 +1058,8 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
                 xanchor="right",
                 x=1
             ),
-            margin=dict(l=40, r=40, t=60, b=40),
+            margin=margin,
+            height=height,
             hovermode="x unified"
         )
     
@@ -615,7 +1072,8 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
             color='Source',
             title=f'Price History for {product_name}',
             labels={'Price': 'Price (€)', 'Date': 'Date', 'Source': 'Source'},
-            template='plotly_white'
+            template='plotly_white',
+            render_mode=webgl_render_mode(len(combined_df))
         )
         
         # Improve layout
@@ -627,7 +1085,8 @@ def create_price_history_chart(price_history_df, product_name, view_mode="line")
                 xanchor="right",
                 x=1
             ),
-            margin=dict(l=40, r=40, t=60, b=40),
+            margin=margin,
+            height=height,
             hovermode="x unified"
         )
     
@@ -660,20 +1119,15 @@ def create_price_statistics_table(price_history_df):
     
     stats_rows = [our_stats]
     
-    # Extract competitor statistics
-    competitors = set()
-    for idx, row in price_history_df.iterrows():
-        if isinstance(row['competitor_prices'], dict):
-            competitors.update(row['competitor_prices'].keys())
-    
-    for competitor in competitors:
-        comp_prices = []
-        for idx, row in price_history_df.iterrows():
-            if isinstance(row['competitor_prices'], dict) and competitor in row['competitor_prices']:
-                price = row['competitor_prices'][competitor]
+    # Collect every competitor's prices in one pass over the history
+    prices_by_competitor = {}
+    for prices in price_history_df['competitor_prices'].to_numpy():
+        if isinstance(prices, dict):
+            for competitor, price in prices.items():
                 if isinstance(price, (int, float)):
-                    comp_prices.append(price)
-        
+                    prices_by_competitor.setdefault(competitor, []).append(price)
+    
+    for competitor, comp_prices in prices_by_competitor.items():
         if comp_prices:
             comp_stats = {
                 'Seller': competitor,
@@ -724,14 +1178,14 @@ def create_price_comparison_gauge_chart(price_history_df, product_name):
     latest_data = price_history_df.iloc[-1]
     our_price = latest_data['our_price']
     
-    # Extract competitor prices
-    competitor_prices = []
-    if isinstance(latest_data['competitor_prices'], dict):
-        for competitor, price in latest_data['competitor_prices'].items():
-            if isinstance(price, (int, float)):
-                competitor_prices.append(price)
+    # Extract the latest competitor prices as one array
+    latest_prices = latest_data['competitor_prices'] if isinstance(latest_data['competitor_prices'], dict) else {}
+    competitor_prices = np.fromiter(
+        (price for price in latest_prices.values() if isinstance(price, (int, float))),
+        dtype=float
+    )
     
-    if not competitor_prices:
+    if competitor_prices.size == 0:
         fig = go.Figure()
         fig.add_annotation(
             text="No competitor price data available",
@@ -743,10 +1197,10 @@ def create_price_comparison_gauge_chart(price_history_df, product_name):
         return fig
     
     # Calculate average competitor price
-    avg_competitor_price = sum(competitor_prices) / len(competitor_prices)
+    avg_competitor_price = float(competitor_prices.mean())
     
-    # Calculate price difference as percentage
-    price_diff_pct = (our_price - avg_competitor_price) / avg_competitor_price * 100
+    # Calculate price difference as percentage (0 when competitors list a zero price)
+    price_diff_pct = (our_price - avg_competitor_price) / avg_competitor_price * 100 if avg_competitor_price else 0
     
     # Create gauge chart
     fig = go.Figure(go.Indicator(
@@ -896,9 +1350,10 @@ def create_price_trend_forecast(price_history_df, product_name, days_to_forecast
     fig = go.Figure()
     
     # Add historical prices
+    # Traces get numpy arrays so plotly can send them as typed arrays
     fig.add_trace(go.Scatter(
-        x=our_prices_df['Date'],
-        y=our_prices_df['Price'],
+        x=our_prices_df['Date'].to_numpy(),
+        y=our_prices_df['Price'].to_numpy(),
         mode='lines+markers',
         name='Historical Prices',
         line=dict(color='blue')
@@ -906,8 +1361,8 @@ def create_price_trend_forecast(price_history_df, product_name, days_to_forecast
     
     # Add forecast
     fig.add_trace(go.Scatter(
-        x=forecast_df['Date'],
-        y=forecast_df['Price'],
+        x=forecast_df['Date'].to_numpy(),
+        y=forecast_df['Price'].to_numpy(),
         mode='lines+markers',
         name='Forecast',
         line=dict(color='red', dash='dash')
@@ -922,16 +1377,16 @@ def create_price_trend_forecast(price_history_df, product_name, days_to_forecast
     forecast_lower = forecast_df['Price'] - 1.96 * rmse
     
     fig.add_trace(go.Scatter(
-        x=forecast_df['Date'],
-        y=forecast_upper,
+        x=forecast_df['Date'].to_numpy(),
+        y=forecast_upper.to_numpy(),
         mode='lines',
         line=dict(width=0),
         showlegend=False
     ))
     
     fig.add_trace(go.Scatter(
-        x=forecast_df['Date'],
-        y=forecast_lower,
+        x=forecast_df['Date'].to_numpy(),
+        y=forecast_lower.to_numpy(),
         mode='lines',
         line=dict(width=0),
         fill='tonexty',
@@ -985,6 +1440,32 @@ def create_price_trend_forecast(price_history_df, product_name, days_to_forecast
     
     return fig
 
+def _competitor_prices_long(price_history_df):
+    """
+    Flatten the competitor price dicts of a price history into long form
+    
+    Args:
+        price_history_df (DataFrame): Price history data
+        
+    Returns:
+        DataFrame: One row per record and competitor with a numeric price
+                   (columns: Row, Date, Competitor, Price, Our Price)
+    """
+    # Gather the records in one pass and allocate the frame once
+    records = [
+        (row, date, competitor, price, our_price)
+        for row, (date, our_price, prices) in enumerate(zip(
+            price_history_df['timestamp'].to_numpy(),
+            price_history_df['our_price'].to_numpy(),
+            price_history_df['competitor_prices'].to_numpy()
+        ))
+        if isinstance(prices, dict)
+        for competitor, price in prices.items()
+        if isinstance(price, (int, float))
+    ]
+    
+    return pd.DataFrame.from_records(records, columns=['Row', 'Date', 'Competitor', 'Price', 'Our Price'])
+
 def create_competitor_price_matrix(price_history_df, product_name):
     """
     Create a heat map visualization of competitor prices
@@ -1010,13 +1491,10 @@ def create_competitor_price_matrix(price_history_df, product_name):
     # Convert timestamp to datetime
     price_history_df['timestamp'] = pd.to_datetime(price_history_df['timestamp'])
     
-    # Get all competitors
-    competitors = set()
-    for idx, row in price_history_df.iterrows():
-        if isinstance(row['competitor_prices'], dict):
-            competitors.update(row['competitor_prices'].keys())
+    # Competitor prices in long form
+    long_df = _competitor_prices_long(price_history_df)
     
-    if not competitors:
+    if long_df.empty:
         fig = go.Figure()
         fig.add_annotation(
             text="No competitor price data available",
@@ -1027,59 +1505,19 @@ def create_competitor_price_matrix(price_history_df, product_name):
         )
         return fig
     
-    # Create a DataFrame for the heatmap
-    heatmap_data = []
+    # One column per competitor, keeping every record as a row
+    prices_wide = long_df.pivot(index='Row', columns='Competitor', values='Price').reindex(range(len(price_history_df)))
     
-    for idx, row in price_history_df.iterrows():
-        date = row['timestamp']
-        our_price = row['our_price']
-        
-        entry = {
-            'Date': date,
-            'Our Price': our_price
-        }
-        
-        if isinstance(row['competitor_prices'], dict):
-            for competitor in competitors:
-                if competitor in row['competitor_prices']:
-                    price = row['competitor_prices'][competitor]
-                    if isinstance(price, (int, float)):
-                        entry[competitor] = price
-        
-        heatmap_data.append(entry)
-    
-    heatmap_df = pd.DataFrame(heatmap_data)
-    
-    # Convert to percent difference from our price
-    for competitor in competitors:
-        if competitor in heatmap_df.columns:
-            heatmap_df[f"{competitor} (%)"] = (heatmap_df[competitor] - heatmap_df['Our Price']) / heatmap_df['Our Price'] * 100
-    
-    # Create the heatmap
-    z_data = []
-    y_labels = []
-    
-    for competitor in competitors:
-        percent_col = f"{competitor} (%)"
-        if percent_col in heatmap_df.columns:
-            z_data.append(heatmap_df[percent_col].values)
-            y_labels.append(competitor)
-    
-    if not z_data:
-        fig = go.Figure()
-        fig.add_annotation(
-            text="Could not calculate price differences",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            showarrow=False,
-            font=dict(size=16)
-        )
-        return fig
+    # Convert to percent difference from our price (one row per competitor for the heatmap)
+    our_prices = price_history_df['our_price'].to_numpy(dtype=float)[:, None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_data = ((prices_wide.to_numpy(dtype=float) - our_prices) / our_prices * 100).T
+    y_labels = prices_wide.columns.tolist()
     
     # Create heatmap
     fig = go.Figure(data=go.Heatmap(
         z=z_data,
-        x=heatmap_df['Date'],
+        x=price_history_df['timestamp'],
         y=y_labels,
         colorscale=[
             [0, 'green'],      # -100% (they are cheaper)
@@ -1142,13 +1580,10 @@ def create_price_difference_chart(price_history_df, product_name):
     # Convert timestamp to datetime
     price_history_df['timestamp'] = pd.to_datetime(price_history_df['timestamp'])
     
-    # Get all competitors
-    competitors = set()
-    for idx, row in price_history_df.iterrows():
-        if isinstance(row['competitor_prices'], dict):
-            competitors.update(row['competitor_prices'].keys())
+    # Competitor prices in long form
+    long_df = _competitor_prices_long(price_history_df)
     
-    if not competitors:
+    if long_df.empty:
         fig = go.Figure()
         fig.add_annotation(
             text="No competitor price data available",
@@ -1159,37 +1594,12 @@ def create_price_difference_chart(price_history_df, product_name):
         )
         return fig
     
-    # Create a DataFrame for the differences
-    diff_data = []
-    
-    for idx, row in price_history_df.iterrows():
-        date = row['timestamp']
-        our_price = row['our_price']
-        
-        if isinstance(row['competitor_prices'], dict):
-            for competitor in competitors:
-                if competitor in row['competitor_prices']:
-                    price = row['competitor_prices'][competitor]
-                    if isinstance(price, (int, float)):
-                        diff_pct = (our_price - price) / price * 100
-                        diff_data.append({
-                            'Date': date,
-                            'Competitor': competitor,
-                            'Difference (%)': diff_pct
-                        })
-    
-    if not diff_data:
-        fig = go.Figure()
-        fig.add_annotation(
-            text="Could not calculate price differences",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5,
-            showarrow=False,
-            font=dict(size=16)
-        )
-        return fig
-    
-    diff_df = pd.DataFrame(diff_data)
+    # Our price difference from each competitor, for every record at once
+    diff_df = pd.DataFrame({
+        'Date': long_df['Date'],
+        'Competitor': long_df['Competitor'],
+        'Difference (%)': (long_df['Our Price'] - long_df['Price']) / long_df['Price'] * 100
+    })
     
     # Create the chart
     fig = px.line(
@@ -1199,7 +1609,8 @@ def create_price_difference_chart(price_history_df, product_name):
         color='Competitor',
         title=f'Price Difference from Competitors for {product_name}',
         labels={'Difference (%)': 'Our Price Difference (%)', 'Date': 'Date', 'Competitor': 'Competitor'},
-        template='plotly_white'
+        template='plotly_white',
+        render_mode=webgl_render_mode(len(diff_df))
     )
     
     # Add a zero line
@@ -1291,4 +1702,64 @@ def create_price_difference_chart(price_history_df, product_name):
         hovermode="x unified"
     )
     
-    return fig
\ No newline at end of file
+    return fig
+
+def create_price_details_composite(price_history_df, product_name):
+    """
+    Combine the price difference chart and the competitor price matrix into one figure
+    
+    Args:
+        price_history_df (DataFrame): Price history data
+        product_name (str): Name of the product
+        
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure with both panels sharing the date axis
+    """
+    diff_fig = create_price_difference_chart(price_history_df, product_name)
+    matrix_fig = create_competitor_price_matrix(price_history_df, product_name)
+    
+    # Without usable competitor prices both builders only hold a message
+    if not diff_fig.data or not matrix_fig.data:
+        return diff_fig if not diff_fig.data else matrix_fig
+    
+    fig = make_subplots(
+        rows=2, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.12,
+        subplot_titles=("Price Difference from Competitors", "Competitor Price Matrix")
+    )
+    
+    # Difference lines with their zones and zone labels on the top panel
+    for trace in diff_fig.data:
+        fig.add_trace(trace, row=1, col=1)
+    for shape in diff_fig.layout.shapes:
+        fig.add_shape(shape, row=1, col=1)
+    for annotation in diff_fig.layout.annotations:
+        fig.add_annotation(annotation, row=1, col=1)
+    
+    # Heatmap on the bottom panel, with its color bar next to it
+    for trace in matrix_fig.data:
+        fig.add_trace(trace, row=2, col=1)
+    fig.update_traces(colorbar=dict(len=0.45, y=0.22), selector=dict(type='heatmap'))
+    
+    fig.update_yaxes(title_text='Our Price Difference (%)', row=1, col=1)
+    fig.update_yaxes(title_text='Competitor', row=2, col=1)
+    fig.update_xaxes(title_text='Date', row=2, col=1)
+    
+    # Update layout
+    fig.update_layout(
+        title=f'Competitor Price Comparison for {product_name}',
+        template='plotly_white',
+        height=800,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        margin=dict(l=40, r=40, t=80, b=40),
+        hovermode="x unified"
+    )
+    
+    return fig
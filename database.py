@@ -1,6 +1,7 @@
 import sqlite3
 import pandas as pd
 import json
+import orjson
 import datetime
 import os
 from io import StringIO
@@ -9,6 +10,23 @@ import csv
 # Database configuration
 DATABASE_FILE = "price_monitor.db"
 
+# Bump this whenever init_db gains new tables, views, indexes or migrations
+SCHEMA_VERSION = 7
+
+# Set once init_db has verified the schema in this process
+_db_initialized = False
+
+def _json_loads(value):
+    """
+    Parse a stored JSON column with orjson, falling back to json for values it rejects
+    
+    json.dumps writes NaN/Infinity for non-finite floats, which orjson refuses to parse.
+    """
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return json.loads(value)
+
 def get_connection():
     """Get a database connection"""
     conn = sqlite3.connect(DATABASE_FILE)
@@ -17,9 +35,21 @@ def get_connection():
 
 def init_db():
     """Initialize database with required tables if they don't exist"""
+    global _db_initialized
+    
+    if _db_initialized:
+        return
+    
     conn = get_connection()
     cursor = conn.cursor()
     
+    # Skip the schema setup if this database is already up to date
+    cursor.execute("PRAGMA user_version")
+    if cursor.fetchone()[0] >= SCHEMA_VERSION:
+        conn.close()
+        _db_initialized = True
+        return
+    
     # Create products table
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS products (
@@ -73,6 +103,79 @@ def init_db():
     )
     ''')
     
+    # Create analysis_batches table (bulk analyses submitted to the OpenAI Batch API)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analysis_batches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        batch_id TEXT NOT NULL UNIQUE,
+        product_ids TEXT NOT NULL,
+        days INTEGER,
+        status TEXT DEFAULT 'validating',
+        price_data TEXT,
+        results TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    
+    # Create product_analyses table (AI analyses kept so reopening a product doesn't call OpenAI again)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS product_analyses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        days INTEGER,
+        history_key TEXT,
+        generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        analysis TEXT NOT NULL,
+        FOREIGN KEY (product_id) REFERENCES products (id)
+    )
+    ''')
+    
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_product_analyses_product_days
+    ON product_analyses (product_id, days, generated_at)
+    ''')
+    
+    # Index used by the latest-price lookups below
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_price_history_product_timestamp
+    ON price_history (product_id, timestamp)
+    ''')
+    
+    # Latest price history row per product
+    cursor.execute('''
+    CREATE VIEW IF NOT EXISTS v_latest_price_history AS
+    SELECT ph.*
+    FROM price_history ph
+    JOIN (
+        SELECT product_id, MAX(timestamp) AS max_timestamp
+        FROM price_history
+        GROUP BY product_id
+    ) latest ON ph.product_id = latest.product_id AND ph.timestamp = latest.max_timestamp
+    ''')
+    
+    # Latest suggestion per product, if it has not been applied yet
+    cursor.execute('''
+    CREATE VIEW IF NOT EXISTS v_active_suggestion AS
+    SELECT sp.*
+    FROM suggested_prices sp
+    JOIN (
+        SELECT product_id, MAX(timestamp) AS max_timestamp
+        FROM suggested_prices
+        GROUP BY product_id
+    ) latest ON sp.product_id = latest.product_id AND sp.timestamp = latest.max_timestamp
+    WHERE sp.is_applied = 0
+    ''')
+    
+    # One row per product and competitor, unpacked from the competitor_urls JSON
+    # (competitor ID for dicts, position for older list rows)
+    cursor.execute('''
+    CREATE VIEW IF NOT EXISTS v_product_competitors AS
+    SELECT p.id AS product_id, c.key AS competitor_id, c.value AS url
+    FROM products p, json_each(p.competitor_urls) c
+    WHERE json_valid(p.competitor_urls)
+    ''')
+    
     # Initialize default settings if not exists
     cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", 
                   ("scraping_interval", "720"))  # Default to 12 hours (720 minutes)
@@ -87,6 +190,18 @@ def init_db():
     
     conn.commit()
     conn.close()
+    
+    # Bring databases created by older versions up to date
+    upgrade_settings_table()
+    upgrade_products_table()
+    upgrade_analysis_batches_table()
+    upgrade_product_analyses_table()
+    
+    conn = get_connection()
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.close()
+    
+    _db_initialized = True
 
 def add_product(name, our_url, our_name_selector, our_price_selector, competitor_urls=None, competitor_selectors=None, 
               min_price_threshold=None, max_price_threshold=None):
@@ -112,6 +227,43 @@ def add_product(name, our_url, our_name_selector, our_price_selector, competitor
     
     return product_id
 
+def add_products_bulk(products):
+    """
+    Add several products to the database in a single transaction
+    
+    Args:
+        products (list): Product dicts with the same keys as the arguments of add_product
+    
+    Returns:
+        int: Number of products added
+    """
+    if not products:
+        return 0
+    
+    rows = [
+        (product['name'], product['our_url'], product.get('our_name_selector'), product['our_price_selector'],
+         json.dumps(product['competitor_urls']) if product.get('competitor_urls') else None,
+         json.dumps(product['competitor_selectors']) if product.get('competitor_selectors') else None,
+         product.get('min_price_threshold'), product.get('max_price_threshold'))
+        for product in products
+    ]
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.executemany('''
+        INSERT INTO products 
+        (name, our_url, our_name_selector, our_price_selector, competitor_urls, competitor_selectors, 
+         min_price_threshold, max_price_threshold)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        conn.commit()
+    finally:
+        conn.close()
+    
+    return len(rows)
+
 def update_product(product_id, name=None, our_url=None, our_name_selector=None, our_price_selector=None, 
                   competitor_urls=None, competitor_selectors=None, min_price_threshold=None, max_price_threshold=None):
     """Update an existing product"""
@@ -190,13 +342,7 @@ def get_products():
            ph.competitor_prices as current_competitor_prices,
            ph.timestamp as last_updated
     FROM products p
-    LEFT JOIN (
-        SELECT ph1.*
-        FROM price_history ph1
-        LEFT JOIN price_history ph2
-            ON ph1.product_id = ph2.product_id AND ph1.timestamp < ph2.timestamp
-        WHERE ph2.timestamp IS NULL
-    ) ph ON p.id = ph.product_id
+    LEFT JOIN v_latest_price_history ph ON p.id = ph.product_id
     '''
     
     try:
@@ -206,7 +352,7 @@ def get_products():
         # Parse JSON columns
         for col in ['competitor_urls', 'competitor_selectors', 'current_competitor_prices']:
             if col in df.columns:
-                df[col] = df[col].apply(lambda x: json.loads(x) if x and pd.notna(x) else None)
+                df[col] = df[col].apply(lambda x: _json_loads(x) if x and pd.notna(x) else None)
         
         conn.close()
         return df
@@ -215,6 +361,65 @@ def get_products():
         conn.close()
         return pd.DataFrame()
 
+def get_competitor_count():
+    """Count the distinct competitors tracked across all products"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT COUNT(DISTINCT competitor_id) FROM v_product_competitors")
+    count = cursor.fetchone()[0]
+    
+    conn.close()
+    return count
+
+def _normalize_competitors(competitor_urls, competitor_selectors):
+    """
+    Combine stored competitor URLs and selectors into one list
+    
+    Args:
+        competitor_urls (dict or list): Competitor URLs, keyed by competitor ID or by position
+        competitor_selectors (dict or list): Selectors as {id: {"name", "price"}} or [[name, price], ...]
+    
+    Returns:
+        list: Dicts with id, url, name_selector and price_selector, ordered by competitor ID
+    """
+    if isinstance(competitor_urls, list):
+        competitor_urls = {str(idx): url for idx, url in enumerate(competitor_urls)}
+    if not isinstance(competitor_urls, dict):
+        return []
+    
+    # Numeric IDs sort numerically, anything else keeps its stored order after them
+    comp_ids = sorted(competitor_urls, key=lambda comp_id: (0, int(comp_id)) if str(comp_id).isdigit() else (1, 0))
+    selector_values = list(competitor_selectors.values()) if isinstance(competitor_selectors, dict) else None
+    
+    competitors = []
+    for idx, comp_id in enumerate(comp_ids):
+        # Selectors are looked up by ID first, then by position
+        if isinstance(competitor_selectors, dict):
+            selectors = competitor_selectors.get(comp_id)
+            if selectors is None and str(comp_id).isdigit() and int(comp_id) < len(selector_values):
+                selectors = selector_values[int(comp_id)]
+        elif isinstance(competitor_selectors, list) and idx < len(competitor_selectors):
+            selectors = competitor_selectors[idx]
+        else:
+            selectors = None
+        
+        name_selector = price_selector = "Not set"
+        if isinstance(selectors, dict):
+            name_selector = selectors.get('name', 'Not set')
+            price_selector = selectors.get('price', 'Not set')
+        elif isinstance(selectors, list) and len(selectors) >= 2:
+            name_selector, price_selector = selectors[0], selectors[1]
+        
+        competitors.append({
+            'id': comp_id,
+            'url': competitor_urls[comp_id],
+            'name_selector': name_selector,
+            'price_selector': price_selector
+        })
+    
+    return competitors
+
 def get_product(product_id):
     """Get a specific product by ID"""
     conn = get_connection()
@@ -226,13 +431,7 @@ def get_product(product_id):
            ph.competitor_prices as current_competitor_prices,
            ph.timestamp as last_updated
     FROM products p
-    LEFT JOIN (
-        SELECT ph1.*
-        FROM price_history ph1
-        LEFT JOIN price_history ph2
-            ON ph1.product_id = ph2.product_id AND ph1.timestamp < ph2.timestamp
-        WHERE ph2.timestamp IS NULL
-    ) ph ON p.id = ph.product_id
+    LEFT JOIN v_latest_price_history ph ON p.id = ph.product_id
     WHERE p.id = ?
     """, (product_id,))
     
@@ -247,10 +446,15 @@ def get_product(product_id):
     for key in ['competitor_urls', 'competitor_selectors', 'current_competitor_prices']:
         if key in product_dict and product_dict[key]:
             try:
-                product_dict[key] = json.loads(product_dict[key])
+                product_dict[key] = _json_loads(product_dict[key])
             except:
                 product_dict[key] = {}
     
+    # Competitors normalized once here so callers don't re-parse the stored formats
+    product_dict['competitors'] = _normalize_competitors(
+        product_dict.get('competitor_urls'), product_dict.get('competitor_selectors')
+    )
+    
     return product_dict
 
 def add_price_data(product_id, our_price, competitor_prices=None):
@@ -298,7 +502,7 @@ def get_price_history(product_id, days=None):
         
         # Parse competitor_prices JSON
         if 'competitor_prices' in df.columns:
-            df['competitor_prices'] = df['competitor_prices'].apply(lambda x: json.loads(x) if x and pd.notna(x) else {})
+            df['competitor_prices'] = df['competitor_prices'].apply(lambda x: _json_loads(x) if x and pd.notna(x) else {})
         
         conn.close()
         return df
@@ -307,6 +511,48 @@ def get_price_history(product_id, days=None):
         conn.close()
         return pd.DataFrame()
 
+def get_price_histories(product_ids, days=None):
+    """
+    Get price history for several products in a single query
+    
+    Args:
+        product_ids (list): Product IDs
+        days (int, optional): Number of days of history to include
+    
+    Returns:
+        DataFrame: Price history of all requested products, ordered by product and timestamp
+    """
+    if not product_ids:
+        return pd.DataFrame()
+    
+    conn = get_connection()
+    
+    # Build the query with optional time filter
+    params = [int(product_id) for product_id in product_ids]
+    placeholders = ", ".join("?" for _ in params)
+    query = f"SELECT * FROM price_history WHERE product_id IN ({placeholders})"
+    
+    if days:
+        cutoff_date = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
+        query += " AND timestamp >= ?"
+        params.append(cutoff_date)
+    
+    query += " ORDER BY product_id, timestamp"
+    
+    try:
+        df = pd.read_sql_query(query, conn, params=params)
+        
+        # Parse competitor_prices JSON
+        if 'competitor_prices' in df.columns:
+            df['competitor_prices'] = df['competitor_prices'].apply(lambda x: _json_loads(x) if x and pd.notna(x) else {})
+        
+        conn.close()
+        return df
+    except Exception as e:
+        print(f"Error getting price histories: {e}")
+        conn.close()
+        return pd.DataFrame()
+
 def update_settings(**kwargs):
     """Update application settings
     
@@ -360,37 +606,55 @@ def update_last_scrape():
     """Update the last scrape timestamp"""
     return update_settings(last_scrape=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
-def get_suggested_prices(product_id=None):
+# SQL expressions for each column get_suggested_prices can return
+SUGGESTED_PRICE_COLUMNS = {
+    "id": "sp.id",
+    "product_id": "sp.product_id",
+    "suggested_price": "sp.suggested_price",
+    "manual_price": "sp.manual_price",
+    "is_applied": "sp.is_applied",
+    "source": "sp.source",
+    "timestamp": "sp.timestamp",
+    "notes": "sp.notes",
+    "product_name": "p.name",
+    "our_url": "p.our_url",
+    "our_price_selector": "p.our_price_selector",
+    "current_price": "ph.our_price"
+}
+
+def get_suggested_prices(product_id=None, fields=None):
     """
     Get suggested prices for one or all products
     
     Args:
         product_id (int, optional): Product ID to get suggestions for. If None, get all suggestions.
+        fields (list, optional): Columns to return (keys of SUGGESTED_PRICE_COLUMNS). If None, return all columns.
     
     Returns:
         DataFrame: Suggested prices data
     """
+    if fields is None:
+        fields = list(SUGGESTED_PRICE_COLUMNS)
+    
+    select_list = ",\n           ".join(f"{SUGGESTED_PRICE_COLUMNS[field]} as {field}" for field in fields)
+    
     conn = get_connection()
     
-    query = """
-    SELECT sp.*, p.name as product_name, 
-           p.our_url, p.our_price_selector,
-           ph.our_price as current_price
+    query = f"""
+    SELECT {select_list}
     FROM suggested_prices sp
     JOIN products p ON sp.product_id = p.id
-    LEFT JOIN (
-        SELECT product_id, MAX(timestamp) as max_timestamp
-        FROM price_history
-        GROUP BY product_id
-    ) latest_ph ON p.id = latest_ph.product_id
-    LEFT JOIN price_history ph ON latest_ph.product_id = ph.product_id AND latest_ph.max_timestamp = ph.timestamp
+    LEFT JOIN v_latest_price_history ph ON p.id = ph.product_id
     """
     
+    # Parse suggestion timestamps once at fetch time
+    parse_dates = {'timestamp': {'format': 'ISO8601'}} if 'timestamp' in fields else None
+    
     if product_id:
         query += " WHERE sp.product_id = ?"
-        df = pd.read_sql_query(query, conn, params=[product_id])
+        df = pd.read_sql_query(query, conn, params=[product_id], parse_dates=parse_dates)
     else:
-        df = pd.read_sql_query(query, conn)
+        df = pd.read_sql_query(query, conn, parse_dates=parse_dates)
     
     conn.close()
     return df
@@ -468,6 +732,36 @@ def update_suggested_price(suggestion_id, manual_price=None, is_applied=None, no
     
     return True
 
+def bulk_update_suggested_prices(suggestion_ids, is_applied=True):
+    """
+    Set the applied flag of many suggestions in one statement
+    
+    Args:
+        suggestion_ids (list): Suggestion IDs to update
+        is_applied (bool): Whether the suggestions have been applied
+    
+    Returns:
+        int: Number of suggestions updated
+    """
+    suggestion_ids = [int(suggestion_id) for suggestion_id in suggestion_ids]
+    if not suggestion_ids:
+        return 0
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    placeholders = ", ".join("?" * len(suggestion_ids))
+    cursor.execute(
+        f"UPDATE suggested_prices SET is_applied = ? WHERE id IN ({placeholders})",
+        [1 if is_applied else 0] + suggestion_ids
+    )
+    updated = cursor.rowcount
+    
+    conn.commit()
+    conn.close()
+    
+    return updated
+
 def delete_suggested_price(suggestion_id):
     """
     Delete a suggested price
@@ -487,51 +781,249 @@ def delete_suggested_price(suggestion_id):
     
     return True
 
-def get_latest_prices():
+def _json_default(value):
+    """Serialize numpy scalars found in analysis results as plain Python values"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def add_analysis_batch(batch_id, product_ids, days=None, status='validating', price_data=None):
+    """
+    Record a bulk analysis submitted to the OpenAI Batch API
+    
+    Args:
+        batch_id (str): OpenAI batch ID
+        product_ids (list): IDs of the products in the batch
+        days (int, optional): Number of days of history analyzed
+        status (str, optional): Batch status reported by OpenAI
+        price_data (list, optional): Price data each product was submitted with
+    
+    Returns:
+        int: ID of the new batch record
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+    INSERT INTO analysis_batches (batch_id, product_ids, days, status, price_data)
+    VALUES (?, ?, ?, ?, ?)
+    ''', (
+        batch_id,
+        json.dumps([int(product_id) for product_id in product_ids]),
+        days,
+        status,
+        json.dumps(price_data, default=_json_default) if price_data is not None else None
+    ))
+    
+    record_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    
+    return record_id
+
+def _analysis_batch_record(row):
+    """Turn an analysis_batches row into a record, parsing its JSON columns"""
+    batch_id, product_ids, days, status, results, created_at, updated_at = row
+    return {
+        "batch_id": batch_id,
+        "product_ids": json.loads(product_ids),
+        "days": days,
+        "status": status,
+        "results": json.loads(results) if results else None,
+        "created_at": created_at,
+        "updated_at": updated_at
+    }
+
+def get_analysis_batches(limit=10):
+    """
+    Get the most recently submitted analysis batches
+    
+    Args:
+        limit (int, optional): Maximum number of batches to return
+    
+    Returns:
+        list: Batch records (product_ids and results parsed from JSON), newest first
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+    SELECT batch_id, product_ids, days, status, results, created_at, updated_at
+    FROM analysis_batches
+    ORDER BY created_at DESC, id DESC
+    LIMIT ?
+    ''', (limit,))
+    rows = cursor.fetchall()
+    conn.close()
+    
+    return [_analysis_batch_record(row) for row in rows]
+
+def get_analysis_batch(batch_id):
+    """
+    Get a single analysis batch, including the price data it was submitted with
+    
+    Args:
+        batch_id (str): OpenAI batch ID
+    
+    Returns:
+        dict: Batch record, or None if the batch is unknown
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+    SELECT batch_id, product_ids, days, status, results, created_at, updated_at, price_data
+    FROM analysis_batches
+    WHERE batch_id = ?
+    ''', (batch_id,))
+    row = cursor.fetchone()
+    conn.close()
+    
+    if not row:
+        return None
+    
+    record = _analysis_batch_record(tuple(row)[:7])
+    record["price_data"] = _json_loads(row[7]) if row[7] else None
+    return record
+
+def update_analysis_batch(batch_id, status, results=None):
+    """
+    Update the status of an analysis batch, and store its results once they are available
+    
+    Args:
+        batch_id (str): OpenAI batch ID
+        status (str): Batch status reported by OpenAI
+        results (list, optional): Analysis results of the batch
+    
+    Returns:
+        bool: True if successful
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    if results is not None:
+        cursor.execute(
+            "UPDATE analysis_batches SET status = ?, results = ?, updated_at = CURRENT_TIMESTAMP WHERE batch_id = ?",
+            (status, json.dumps(results, default=_json_default), batch_id)
+        )
+    else:
+        cursor.execute(
+            "UPDATE analysis_batches SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE batch_id = ?",
+            (status, batch_id)
+        )
+    
+    conn.commit()
+    conn.close()
+    
+    return True
+
+def save_analysis(product_id, days, analysis, history_key=None):
+    """
+    Store an AI price analysis of a product
+    
+    Args:
+        product_id (int): Product ID
+        days (int): Number of days of history analyzed (None for all time)
+        analysis (dict): Analysis results
+        history_key (str, optional): State of the price history the analysis was based on
+    
+    Returns:
+        int: ID of the stored analysis
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+    INSERT INTO product_analyses (product_id, days, history_key, analysis, generated_at)
+    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ''', (int(product_id), days, history_key, json.dumps(analysis, default=_json_default)))
+    
+    analysis_id = cursor.lastrowid
+    conn.commit()
+    conn.close()
+    
+    return analysis_id
+
+def get_latest_analysis(product_id, days, history_key=None, max_age_hours=6):
+    """
+    Get the most recent stored AI price analysis of a product, if it is still fresh
+    
+    An analysis is fresh when it was based on the same price history and is younger than max_age_hours.
+    
+    Args:
+        product_id (int): Product ID
+        days (int): Number of days of history analyzed (None for all time)
+        history_key (str, optional): Current state of the price history
+        max_age_hours (float, optional): Ignore analyses older than this
+    
+    Returns:
+        dict: Analysis results with their generated_at timestamp, or None if there is no fresh analysis
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+    SELECT analysis, generated_at
+    FROM product_analyses
+    WHERE product_id = ? AND days IS ? AND history_key IS ? AND generated_at >= datetime('now', ?)
+    ORDER BY generated_at DESC, id DESC
+    LIMIT 1
+    ''', (int(product_id), days, history_key, f"-{max_age_hours} hours"))
+    row = cursor.fetchone()
+    conn.close()
+    
+    if not row:
+        return None
+    
+    analysis = _json_loads(row[0])
+    analysis['generated_at'] = row[1]
+    return analysis
+
+# SQL expressions for each column get_latest_prices can return
+LATEST_PRICE_COLUMNS = {
+    "id": "p.id",
+    "name": "p.name",
+    "our_url": "p.our_url",
+    "current_price": "ph.our_price",
+    "competitor_prices": "ph.competitor_prices",
+    "price_timestamp": "ph.timestamp",
+    "suggested_price": "sp.suggested_price",
+    "manual_price": "sp.manual_price",
+    "final_suggested_price": "COALESCE(sp.manual_price, sp.suggested_price)",
+    "suggestion_source": "sp.source",
+    "suggestion_timestamp": "sp.timestamp",
+    "notes": "sp.notes"
+}
+
+def get_latest_prices(fields=None):
     """
     Get the latest price for each product along with any active price suggestions
     
+    Args:
+        fields (list, optional): Columns to return (keys of LATEST_PRICE_COLUMNS). If None, return all columns.
+    
     Returns:
         DataFrame: Latest prices and suggestions
     """
+    if fields is None:
+        fields = list(LATEST_PRICE_COLUMNS)
+    
+    select_list = ",\n           ".join(f"{LATEST_PRICE_COLUMNS[field]} as {field}" for field in fields)
+    
     conn = get_connection()
     
-    query = """
-    SELECT p.id, p.name, p.our_url, 
-           ph.our_price as current_price, 
-           ph.competitor_prices,
-           ph.timestamp as price_timestamp,
-           sp.suggested_price,
-           sp.manual_price,
-           CASE 
-               WHEN sp.manual_price IS NOT NULL THEN sp.manual_price 
-               ELSE sp.suggested_price 
-           END as final_suggested_price,
-           sp.source as suggestion_source,
-           sp.timestamp as suggestion_timestamp,
-           sp.notes
+    query = f"""
+    SELECT {select_list}
     FROM products p
-    LEFT JOIN (
-        SELECT ph1.*
-        FROM price_history ph1
-        LEFT JOIN price_history ph2
-            ON ph1.product_id = ph2.product_id AND ph1.timestamp < ph2.timestamp
-        WHERE ph2.timestamp IS NULL
-    ) ph ON p.id = ph.product_id
-    LEFT JOIN (
-        SELECT sp1.*
-        FROM suggested_prices sp1
-        LEFT JOIN suggested_prices sp2
-            ON sp1.product_id = sp2.product_id AND sp1.timestamp < sp2.timestamp
-        WHERE sp2.timestamp IS NULL AND sp1.is_applied = 0
-    ) sp ON p.id = sp.product_id
+    LEFT JOIN v_latest_price_history ph ON p.id = ph.product_id
+    LEFT JOIN v_active_suggestion sp ON p.id = sp.product_id
     """
     
     df = pd.read_sql_query(query, conn)
     
     # Parse competitor_prices JSON
     if 'competitor_prices' in df.columns:
-        df['competitor_prices'] = df['competitor_prices'].apply(lambda x: json.loads(x) if x and pd.notna(x) else {})
+        df['competitor_prices'] = df['competitor_prices'].apply(lambda x: _json_loads(x) if x and pd.notna(x) else {})
     
     conn.close()
     return df
@@ -546,7 +1038,8 @@ def export_prices_to_json(output_file=None):
     Returns:
         str: JSON string if output_file is None, otherwise None
     """
-    df = get_latest_prices()
+    df = get_latest_prices(fields=["id", "name", "current_price", "final_suggested_price",
+                                   "competitor_prices", "price_timestamp"])
     
     if df.empty:
         result = "[]"
@@ -584,7 +1077,7 @@ def export_prices_to_csv(output_file=None):
     Returns:
         str: CSV string if output_file is None, otherwise None
     """
-    df = get_latest_prices()
+    df = get_latest_prices(fields=["id", "name", "current_price", "final_suggested_price", "competitor_prices"])
     
     if df.empty:
         result = ""
@@ -597,18 +1090,10 @@ def export_prices_to_csv(output_file=None):
             "suggested_price": df['final_suggested_price']
         })
         
-        # Add competitor prices as separate columns
-        competitors = set()
-        for _, row in df.iterrows():
-            if pd.notna(row['competitor_prices']) and row['competitor_prices']:
-                competitors.update(row['competitor_prices'].keys())
-        
-        for competitor in competitors:
-            export_df[f"{competitor}_price"] = df.apply(
-                lambda row: row['competitor_prices'].get(competitor) 
-                if pd.notna(row['competitor_prices']) and row['competitor_prices'] else None, 
-                axis=1
-            )
+        # Add competitor prices as separate columns (the dicts expand into one column per key in one step)
+        competitor_df = pd.DataFrame(df['competitor_prices'].tolist(), index=df.index)
+        if not competitor_df.empty:
+            export_df = export_df.join(competitor_df.add_suffix("_price"))
         
         # Write to CSV string
         output = StringIO()
@@ -654,7 +1139,7 @@ def upgrade_settings_table():
     return True
 
 def upgrade_products_table():
-    """Upgrade products table to add price threshold columns"""
+    """Upgrade products table to add price threshold columns and store competitor URLs as JSON"""
     conn = get_connection()
     cursor = conn.cursor()
     
@@ -670,6 +1155,57 @@ def upgrade_products_table():
     if "max_price_threshold" not in columns:
         cursor.execute("ALTER TABLE products ADD COLUMN max_price_threshold REAL")
     
+    # Convert legacy comma-separated competitor URLs to JSON lists, so they are parsed once when read
+    cursor.execute('''
+    SELECT id, competitor_urls FROM products
+    WHERE competitor_urls IS NOT NULL AND competitor_urls != ''
+      AND (NOT json_valid(competitor_urls) OR json_type(competitor_urls) = 'text')
+    ''')
+    for product_id, competitor_urls in cursor.fetchall():
+        try:
+            competitor_urls = json.loads(competitor_urls)
+        except ValueError:
+            pass
+        urls = [url.strip() for url in competitor_urls.split(',') if url.strip()]
+        cursor.execute(
+            "UPDATE products SET competitor_urls = ? WHERE id = ?",
+            (json.dumps(urls) if urls else None, product_id)
+        )
+    
+    conn.commit()
+    conn.close()
+    return True
+
+def upgrade_analysis_batches_table():
+    """Upgrade analysis_batches table to store the price data each batch was submitted with"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # Check if price_data column exists
+    cursor.execute("PRAGMA table_info(analysis_batches)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    # Add price_data column if it doesn't exist
+    if "price_data" not in columns:
+        cursor.execute("ALTER TABLE analysis_batches ADD COLUMN price_data TEXT")
+    
+    conn.commit()
+    conn.close()
+    return True
+
+def upgrade_product_analyses_table():
+    """Upgrade product_analyses table to record the price history state each analysis was based on"""
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # Check if history_key column exists
+    cursor.execute("PRAGMA table_info(product_analyses)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    # Add history_key column if it doesn't exist
+    if "history_key" not in columns:
+        cursor.execute("ALTER TABLE product_analyses ADD COLUMN history_key TEXT")
+    
     conn.commit()
     conn.close()
-    return True
\ No newline at end of file
+    return True
@@ -6,35 +6,477 @@ import plotly.graph_objects as go
 import datetime
 import json
 import io
-import base64
 from io import BytesIO, StringIO
 import os
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from openpyxl import Workbook
 
 from database import (
-    get_products, get_product, add_product, update_product, delete_product, 
-    get_price_history, get_settings, update_settings, get_suggested_prices,
-    add_suggested_price, update_suggested_price, delete_suggested_price,
-    get_latest_prices, export_prices_to_json, export_prices_to_csv
+    get_products, get_product, add_product, add_products_bulk, update_product, delete_product, 
+    get_price_history, get_price_histories, get_settings, update_settings, get_suggested_prices,
+    add_suggested_price, update_suggested_price, bulk_update_suggested_prices, delete_suggested_price,
+    get_latest_prices, export_prices_to_json, export_prices_to_csv, get_competitor_count,
+    get_analysis_batches, save_analysis, get_latest_analysis
 )
 from scraper import (
-    scrape_all_products, test_scrape, get_scheduler_status, 
+    scrape_all_products, test_scrape, test_scrape_many, get_scheduler_status, 
     start_scheduler, stop_scheduler, run_scraper_now
 )
+from scheduler import (
+    start_scheduler as start_auto_scheduler, get_scheduler_status as get_auto_scheduler_status
+)
 from analyzers import (
-    get_price_analysis, get_bulk_analysis,
+    get_price_analysis, get_bulk_analysis, submit_analysis_batch, check_analysis_batch,
     create_price_history_chart, create_price_statistics_table,
     create_price_comparison_gauge_chart, create_price_trend_forecast,
-    create_competitor_price_matrix, create_price_difference_chart
+    create_price_details_composite, downsample_price_history, scatter_trace
 )
 
+# Cached data access, so widget reruns don't hit the database
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_get_products():
+    """Get all products (cached for 60 seconds)"""
+    return get_products()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_get_product(product_id):
+    """Get a single product with its competitors (cached for 60 seconds per product)"""
+    return get_product(product_id)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_product_options():
+    """Get the (id, name) pairs offered by the product selectors (cached for 60 seconds)"""
+    products_df = _cached_get_products()
+    return list(zip(products_df['id'].tolist(), products_df['name'].tolist()))
+
+def _clear_products():
+    """Invalidate the cached product list, selector options and product details"""
+    _cached_get_products.clear()
+    _cached_product_options.clear()
+    _cached_get_product.clear()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_test_scrape(url, price_selector, name_selector=None):
+    """Test scraping a URL with given selectors (cached for 5 minutes per URL and selectors)"""
+    return test_scrape(url, price_selector, name_selector)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_test_scrape_many(targets):
+    """Test several URLs and selectors concurrently (cached for 5 minutes per set of targets)"""
+    return test_scrape_many(list(targets))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_get_settings():
+    """Get application settings (cached for 5 minutes, cleared on every update)"""
+    return get_settings()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_suggested_prices():
+    """Get all price suggestions with the columns the price management page shows (cached for 60 seconds)"""
+    return get_suggested_prices(fields=[
+        'id', 'product_name', 'current_price', 'suggested_price',
+        'manual_price', 'source', 'timestamp', 'notes'
+    ])
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_latest_prices():
+    """Get the latest prices with final suggested prices (cached for 60 seconds)"""
+    return get_latest_prices(fields=['id', 'name', 'current_price', 'final_suggested_price'])
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_json_export():
+    """Build the JSON price export as bytes (cached for 60 seconds)"""
+    return export_prices_to_json().encode()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_csv_export():
+    """Build the CSV price export as bytes (cached for 60 seconds)"""
+    return export_prices_to_csv().encode()
+
+def _clear_latest_prices():
+    """Invalidate the cached latest prices and the exports built from them"""
+    _cached_latest_prices.clear()
+    _cached_json_export.clear()
+    _cached_csv_export.clear()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_scheduler_status():
+    """Get the scheduler status (cached for 5 seconds)"""
+    return get_scheduler_status()
+
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_auto_scheduler_status():
+    """Get the status of the background scrape scheduler started by the app (cached for 5 seconds)"""
+    return get_auto_scheduler_status()
+
+def ensure_scheduler_running():
+    """Start the background scrape scheduler unless it is already running"""
+    if not _cached_auto_scheduler_status()["running"]:
+        start_auto_scheduler()
+        _cached_auto_scheduler_status.clear()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _cached_price_histories(product_ids, days=None):
+    """
+    Get price histories for several products with one query (cached for 60 seconds)
+    
+    Args:
+        product_ids (tuple): Product IDs
+        days (int, optional): Number of days of history to include
+    
+    Returns:
+        dict: Price history DataFrame per product ID (products without history are omitted)
+    """
+    histories_df = get_price_histories(list(product_ids), days)
+    if histories_df.empty:
+        return {}
+    
+    return {
+        int(product_id): history.reset_index(drop=True)
+        for product_id, history in histories_df.groupby('product_id')
+    }
+
+# Stored AI analyses younger than this are shown instead of calling OpenAI again
+ANALYSIS_MAX_AGE_HOURS = 6
+
+def _price_history_key(price_history):
+    """
+    Describe the state of a price history, so a new scrape invalidates analyses based on the old one
+    
+    Args:
+        price_history (DataFrame): Price history
+    
+    Returns:
+        str: Record count and latest timestamp, or None for an empty history
+    """
+    if price_history.empty:
+        return None
+    return f"{len(price_history)}|{price_history['timestamp'].max()}"
+
+# Single-product analyses run on these worker threads, so the script keeps reacting to the user
+# while OpenAI answers; in-flight requests are shared by product, period and history state
+_analysis_executor = ThreadPoolExecutor(max_workers=4)
+_pending_analyses = {}
+_pending_analyses_lock = threading.Lock()
+
+def _analyze_and_store(product_id, days, price_history, history_key):
+    """Run the AI analysis of a product and store it if it succeeded (runs on a worker thread)"""
+    try:
+        analysis = get_price_analysis(product_id, days, price_history)
+    except Exception as e:
+        return {
+            "product_id": product_id,
+            "error": f"Analysis error: {str(e)}"
+        }
+    
+    # Keep successful analyses so reopening the product doesn't call OpenAI again
+    if 'error' not in analysis:
+        save_analysis(product_id, days, analysis, history_key)
+    
+    return analysis
+
+def _get_stored_price_analysis(product_id, days, price_history, force_refresh=False):
+    """
+    Get a product's AI price analysis, reusing the one stored in the database while it is fresh
+    
+    A stored analysis is reused for ANALYSIS_MAX_AGE_HOURS as long as the price history is unchanged.
+    Only successful analyses are stored, so errors are retried on the next request.
+    
+    A new analysis is requested on a worker thread while the page shows how long it has been waiting.
+    Interacting with the page meanwhile interrupts the wait without cancelling the request: it still
+    completes and is stored, and asking again re-attaches to it instead of calling OpenAI twice.
+    
+    Args:
+        product_id (int): Product ID
+        days (int): Number of days of history to include (None for all time)
+        price_history (DataFrame): Pre-fetched price history
+        force_refresh (bool): Ignore any stored analysis and request a new one
+    
+    Returns:
+        dict: Analysis results (stored ones include their generated_at timestamp)
+    """
+    history_key = _price_history_key(price_history)
+    
+    if not force_refresh:
+        stored = get_latest_analysis(product_id, days, history_key, ANALYSIS_MAX_AGE_HOURS)
+        if stored:
+            return stored
+    
+    request_key = (product_id, days, history_key)
+    with _pending_analyses_lock:
+        future = _pending_analyses.get(request_key)
+        if future is None:
+            future = _analysis_executor.submit(_analyze_and_store, product_id, days, price_history, history_key)
+            _pending_analyses[request_key] = future
+            future.add_done_callback(lambda _: _pending_analyses.pop(request_key, None))
+    
+    # Poll instead of blocking, so a click elsewhere can stop this run right away
+    progress = st.empty()
+    started = time.monotonic()
+    while not future.done():
+        progress.caption(f"Waiting for the AI analysis... {time.monotonic() - started:.0f}s")
+        time.sleep(0.5)
+    progress.empty()
+    
+    return future.result()
+
+@st.cache_data(show_spinner=False)
+def _cached_history_chart(_price_history, product_id, days, product_name, view_mode, cache_key, compact=False):
+    """
+    Build the price history chart, cached per product, period, chart type and history state
+    
+    Args:
+        _price_history (DataFrame): Price history data (not hashed)
+        product_id (int): Product ID
+        days (int): Number of days the history covers (None for all time), so two periods
+            that happen to share a history state don't share a chart
+        product_name (str): Name of the product
+        view_mode (str): Visualization type
+        cache_key (tuple): (record count, latest timestamp) of the price history
+        compact (bool): Build a small chart for grids
+    
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object
+    """
+    # Candlesticks aggregate per day themselves and need every record
+    if view_mode != "candlestick":
+        _price_history = downsample_price_history(_price_history)
+    return create_price_history_chart(_price_history, product_name, view_mode, compact)
+
+@st.cache_data(show_spinner=False)
+def _cached_analysis_charts(_price_history, product_id, days, product_name, cache_key):
+    """
+    Build the price history and trend forecast charts for the price analysis page
+    
+    Args:
+        _price_history (DataFrame): Price history data (not hashed)
+        product_id (int): Product ID
+        days (int): Analysis period in days
+        product_name (str): Name of the product
+        cache_key (tuple): (record count, latest timestamp) of the price history
+    
+    Returns:
+        tuple: (price history figure, trend forecast figure)
+    """
+    return (
+        create_price_history_chart(downsample_price_history(_price_history), product_name),
+        create_price_trend_forecast(_price_history, product_name)
+    )
+
+@st.cache_data(show_spinner=False)
+def _cached_detail_figures(_price_history, product_id, product_name, cache_key):
+    """
+    Build the statistics table and the market position charts for the product details view
+    
+    Args:
+        _price_history (DataFrame): Price history data (not hashed)
+        product_id (int): Product ID
+        product_name (str): Name of the product
+        cache_key (tuple): (record count, latest timestamp) of the price history
+    
+    Returns:
+        tuple: (stats DataFrame, gauge figure, competitor comparison figure)
+    """
+    return (
+        create_price_statistics_table(_price_history),
+        create_price_comparison_gauge_chart(_price_history, product_name),
+        create_price_details_composite(_price_history, product_name)
+    )
+
+@st.cache_data(show_spinner=False)
+def _cached_price_position_chart(_results_df, results_hash):
+    """
+    Build the multi-product 'Our Prices vs Competitor Ranges' chart
+    
+    Args:
+        _results_df (DataFrame): Analysis results with numeric price columns (not hashed)
+        results_hash (int): Hash of the analysis results
+    
+    Returns:
+        plotly.graph_objects.Figure: Plotly figure object, or None without results
+    """
+    # Create a comparative price positions chart (float32 is plenty for plotting prices)
+    pos_df = pd.DataFrame({
+        'product': _results_df['product_name'].fillna('Unknown').astype(str),
+        'our_price': _results_df['current_price'].astype(np.float32),
+        'average_competitor': _results_df['average_competitor_price'].astype(np.float32),
+        'lowest_competitor': _results_df['lowest_competitor_price'].astype(np.float32),
+        'highest_competitor': _results_df['highest_competitor_price'].astype(np.float32)
+    })
+    
+    # Difference from the competitor average (0 where there is no average)
+    average = pos_df['average_competitor']
+    pos_df['price_difference_pct'] = (
+        (pos_df['our_price'] - average) / average.where(average != 0) * 100
+    ).fillna(0)
+    
+    if pos_df.empty:
+        return None
+    
+    # Sort by price difference
+    pos_df = pos_df.sort_values('price_difference_pct')
+    
+    # Create the chart
+    fig = go.Figure()
+    
+    # Add trace for our price
+    fig.add_trace(go.Bar(
+        y=pos_df['product'].to_numpy(),
+        x=pos_df['our_price'].to_numpy(),
+        name='Our Price',
+        orientation='h',
+        marker=dict(color='rgba(58, 71, 80, 0.8)')
+    ))
+    
+    # Add all competitor ranges as one line trace, with gaps between products
+    n = len(pos_df)
+    range_x = np.column_stack((
+        pos_df['lowest_competitor'].to_numpy(),
+        pos_df['highest_competitor'].to_numpy(),
+        np.full(n, np.nan, dtype=np.float32)
+    )).ravel()
+    products = pos_df['product'].to_numpy(dtype=object)
+    range_y = np.column_stack((products, products, np.full(n, None, dtype=object))).ravel()
+    
+    fig.add_trace(scatter_trace(
+        len(range_x),
+        x=range_x,
+        y=range_y,
+        mode='lines',
+        line=dict(color="rgba(156, 165, 196, 1)", width=4),
+        name='Competitor Range',
+        hoverinfo='skip'
+    ))
+    
+    # Add markers for the competitor averages
+    fig.add_trace(scatter_trace(
+        n,
+        x=pos_df['average_competitor'].to_numpy(),
+        y=products,
+        mode='markers',
+        marker=dict(symbol='diamond', size=10, color='rgba(255, 0, 0, 0.7)'),
+        name='Avg Competitor'
+    ))
+    
+    # Update layout
+    fig.update_layout(
+        title='Our Prices vs Competitor Ranges',
+        xaxis_title='Price (€)',
+        yaxis_title='Product',
+        barmode='group',
+        height=max(400, len(pos_df) * 60),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        margin=dict(l=20, r=20, t=50, b=50),
+    )
+    
+    return fig
+
+# Plotly config for read-only charts: no hover, zoom or mode bar to set up in the browser
+STATIC_CHART_CONFIG = {'staticPlot': True, 'displayModeBar': False}
+
+# Price statistics stay numeric (sortable) and are formatted by the grid
+PRICE_STATISTICS_COLUMN_CONFIG = {
+    **{col: st.column_config.NumberColumn(col, format='€%.2f') for col in ['Latest', 'Average', 'Min', 'Max', 'Change']},
+    'Change %': st.column_config.NumberColumn('Change %', format='%.2f%%')
+}
+
+# Home Page
+def home_page():
+    st.title("Price Monitor & Analyzer")
+    
+    # App description
+    st.markdown("""
+    ### Track competitor prices and optimize your pricing strategy
+    This application helps you monitor product prices across multiple platforms,
+    analyze pricing trends, and get AI-powered price recommendations to stay competitive.
+    """)
+    
+    # Dashboard summary
+    st.subheader("Dashboard Summary")
+    
+    # Get products (cached, shared with the other pages)
+    if st.button("Refresh"):
+        _clear_products()
+    products_df = _cached_get_products()
+    
+    _home_summary_metrics(products_df)
+    
+    # Feature highlights with images
+    st.subheader("Key Features")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("""
+        ### Price Monitoring
+        - Track prices across multiple platforms
+        - Schedule automatic price checks
+        - Get notified of price changes
+        """)
+    
+    with col2:
+        st.markdown("""
+        ### Data Analysis
+        - Visualize price trends over time
+        - Compare your prices with competitors
+        - Get AI-powered pricing recommendations
+        """)
+    
+    # Quick guide
+    st.subheader("Getting Started")
+    st.markdown("""
+    1. Add products with the "Add Product" page
+    2. Set up scraping schedules in "Settings"
+    3. Monitor products and track prices
+    4. Generate AI price analysis for individual products
+    5. Use "Multi-Product Analysis" to compare and analyze multiple products at once
+    6. Manage and apply pricing suggestions using "Price Management"
+    7. Export suggested prices in JSON or CSV format for your systems
+    """)
+
+def _home_summary_metrics(products_df):
+    """
+    Render the dashboard summary metrics of the home page
+    
+    Args:
+        products_df (DataFrame): Products with their latest price data
+    """
+    # Create metrics
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Products Monitored", len(products_df) if not products_df.empty else 0)
+    
+    with col2:
+        # Count unique competitors (aggregated in SQL from the competitor view)
+        competitor_count = get_competitor_count() if not products_df.empty else 0
+        st.metric("Competitors Tracked", competitor_count)
+    
+    with col3:
+        # Get last update time if available
+        if not products_df.empty and 'last_checked' in products_df.columns:
+            # Parse the whole column at once (unparseable values become NaT) and take the latest
+            max_date = pd.to_datetime(products_df['last_checked'], format='ISO8601', errors='coerce').max()
+            last_check = max_date.strftime('%Y-%m-%d %H:%M') if pd.notna(max_date) else "Never"
+        else:
+            last_check = "Never"
+        st.metric("Last Price Check", last_check)
+
 # Monitor Products Page
 def monitor_products_page():
     st.title("📊 Monitor Products")
     
     # Get products from database
-    products_df = get_products()
+    products_df = _cached_get_products()
     
     if products_df.empty:
         st.warning("No products found. Please add products first.")
@@ -44,265 +486,374 @@ def monitor_products_page():
     overview_tab, details_tab = st.tabs(["Products Overview", "Product Details"])
     
     with overview_tab:
-        st.subheader("Products Overview")
-        
-        # Add status indicator
-        status_cols = st.columns(3)
-        
-        with status_cols[0]:
-            # Count total products
-            st.metric("Total Products", len(products_df))
-        
-        with status_cols[1]:
-            # Last update time
-            if 'last_checked' in products_df.columns:
-                last_update = pd.to_datetime(products_df['last_checked']).max()
-                if pd.notna(last_update):
-                    last_update_str = last_update.strftime('%Y-%m-%d %H:%M')
-                    st.metric("Last Updated", last_update_str)
-                else:
-                    st.metric("Last Updated", "Never")
+        _monitor_overview_fragment(products_df)
+    
+    with details_tab:
+        _monitor_details_fragment()
+
+def _build_display_df(products_df):
+    """
+    Build the product status table shown on the monitor overview
+    
+    Args:
+        products_df (DataFrame): Products with their latest price data
+    
+    Returns:
+        DataFrame: ID, product, last checked, raw price and status columns
+    """
+    # Malformed or legacy timestamps become NaT instead of failing the whole table
+    last_checked = pd.to_datetime(products_df['last_checked'], format='ISO8601', errors='coerce', cache=True)
+    
+    # Build the display table in one pass over the source columns, with narrow dtypes
+    # so the Arrow payload sent to the browser stays small
+    return pd.DataFrame({
+        'ID': products_df['id'].astype('int32'),
+        'Product': products_df['name'],
+        'Last Checked': last_checked.dt.strftime('%Y-%m-%d %H:%M:%S').fillna('Never'),
+        'Current Price': products_df['current_price'].astype('float32'),
+        'Status': pd.Categorical(np.where(last_checked.notna(), "✅ Active", "❌ Not scraped yet"))
+    })
+
+@st.fragment
+def _monitor_overview_fragment(products_df):
+    """
+    Render the overview tab of the monitor page
+    
+    Runs as a fragment so its widgets only rerun this tab.
+    
+    Args:
+        products_df (DataFrame): Products to summarize
+    """
+    st.subheader("Products Overview")
+    
+    # Add status indicator
+    status_cols = st.columns(3)
+    
+    with status_cols[0]:
+        # Count total products
+        st.metric("Total Products", len(products_df))
+    
+    with status_cols[1]:
+        # Last update time
+        if 'last_checked' in products_df.columns:
+            last_update = pd.to_datetime(products_df['last_checked'], format='ISO8601', errors='coerce').max()
+            if pd.notna(last_update):
+                last_update_str = last_update.strftime('%Y-%m-%d %H:%M')
+                st.metric("Last Updated", last_update_str)
             else:
                 st.metric("Last Updated", "Never")
-        
-        with status_cols[2]:
-            # Scheduler status
-            scheduler_status = get_scheduler_status()
-            status_text = "Active" if scheduler_status["running"] else "Inactive"
-            st.metric("Auto-Scraper", status_text)
-        
-        # Create a run now button
-        if st.button("Run Scraper Now", type="primary"):
-            with st.spinner("Scraping products..."):
-                results = run_scraper_now()
-                st.success(f"Scraping completed: {results.get('scraped', 0)} products scraped, {results.get('errors', 0)} errors")
-                # Refresh the page to update data
-                st.rerun()
-        
-        # Add product list with status
-        st.markdown("### Product Status")
-        
-        # Function to format status
-        def format_status(status):
-            if status:
-                return "✅ Active"
-            else:
-                return "❌ Not scraped yet"
-        
-        # Create a DataFrame with essential columns for display
-        if not products_df.empty:
-            display_df = products_df[['id', 'name', 'last_checked', 'current_price']].copy()
-            
-            # Add status column
-            display_df['status'] = display_df['last_checked'].notna()
-            display_df['status'] = display_df['status'].apply(format_status)
-            
-            # Rename columns
-            display_df = display_df.rename(columns={
-                'id': 'ID',
-                'name': 'Product',
-                'last_checked': 'Last Checked',
-                'current_price': 'Current Price',
-                'status': 'Status'
-            })
-            
-            # Format datetime columns
-            if 'Last Checked' in display_df.columns:
-                display_df['Last Checked'] = pd.to_datetime(display_df['Last Checked']).dt.strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Format price columns
-            if 'Current Price' in display_df.columns:
-                display_df['Current Price'] = display_df['Current Price'].apply(lambda x: f"€{x:.2f}" if pd.notna(x) else "N/A")
-            
-            # Display the DataFrame
-            st.dataframe(display_df, use_container_width=True)
+        else:
+            st.metric("Last Updated", "Never")
     
-    with details_tab:
-        st.subheader("Product Details")
+    with status_cols[2]:
+        # Scheduler status
+        scheduler_status = _cached_scheduler_status()
+        status_text = "Active" if scheduler_status["running"] else "Inactive"
+        st.metric("Auto-Scraper", status_text)
+    
+    # Create a run now button
+    if st.button("Run Scraper Now", type="primary"):
+        with st.spinner("Scraping products..."):
+            results = run_scraper_now()
+            st.success(f"Scraping completed: {results.get('scraped', 0)} products scraped, {results.get('errors', 0)} errors")
+            # Refresh the page to update data
+            _clear_products()
+            _cached_price_histories.clear()
+            _clear_latest_prices()
+            _cached_scheduler_status.clear()
+            st.rerun()
+    
+    # Add product list with status
+    st.markdown("### Product Status")
+    
+    # Rebuild the display table only when the products changed since the last rerun
+    if not products_df.empty:
+        display_key = (
+            len(products_df),
+            int(pd.util.hash_pandas_object(products_df[['id', 'name', 'last_checked', 'current_price']], index=False).sum())
+        )
+        if st.session_state.get('_display_df_key') != display_key:
+            st.session_state['_display_df'] = _build_display_df(products_df)
+            st.session_state['_display_df_key'] = display_key
         
-        # Create a selectbox for product selection
-        product_options = [(row['id'], row['name']) for _, row in products_df.iterrows()]
-        selected_product = st.selectbox(
-            "Select Product",
-            options=product_options,
-            format_func=lambda x: f"{x[1]}"
+        # Display the DataFrame
+        st.dataframe(
+            st.session_state['_display_df'],
+            column_config={
+                'Current Price': st.column_config.NumberColumn('Current Price', format='€%.2f')
+            },
+            use_container_width=True
         )
+
+@st.fragment
+def _monitor_details_fragment():
+    """
+    Render the product details tab of the monitor page
+    
+    Runs as a fragment so changing the chart type or testing a selector only reruns this tab.
+    """
+    st.subheader("Product Details")
+    
+    # Create a selectbox for product selection
+    product_options = _cached_product_options()
+    selected_product = st.selectbox(
+        "Select Product",
+        options=product_options,
+        format_func=lambda x: f"{x[1]}"
+    )
+    
+    if selected_product:
+        product_id = selected_product[0]
+        
+        # Get product details
+        product = _cached_get_product(product_id)
         
-        if selected_product:
-            product_id = selected_product[0]
+        if product:
+            st.markdown(f"### {product['name']}")
             
-            # Get product details
-            product = get_product(product_id)
+            # Create tabs for different views
+            price_tab, config_tab = st.tabs(["Price History", "Product Configuration"])
             
-            if product:
-                st.markdown(f"### {product['name']}")
-                
-                # Create tabs for different views
-                price_tab, config_tab = st.tabs(["Price History", "Product Configuration"])
+            with price_tab:
+                # Get price history for the selected product only (cached per product)
+                price_history = _cached_price_histories((product_id,)).get(product_id, pd.DataFrame())
                 
-                with price_tab:
-                    # Get price history for the selected product
-                    price_history = get_price_history(product_id)
+                if not price_history.empty:
+                    st.success(f"Found {len(price_history)} price records")
                     
-                    if not price_history.empty:
-                        st.success(f"Found {len(price_history)} price records")
+                    # Display price history chart
+                    view_mode = st.radio(
+                        "Chart Type",
+                        options=["line", "area", "bar", "candlestick"],
+                        index=0,
+                        horizontal=True
+                    )
+                    
+                    # Charts only need rebuilding when new prices arrive
+                    cache_key = (len(price_history), price_history['timestamp'].max())
+                    
+                    # The details panel always shows the full history (no period)
+                    fig = _cached_history_chart(price_history, product_id, None, product['name'], view_mode, cache_key)
+                    st.plotly_chart(fig, use_container_width=True)
+                    
+                    # Build the statistics and comparison charts only once they are asked for
+                    details_key = f"_details_loaded_{product_id}"
+                    if st.session_state.get(details_key) or st.button("Load Statistics & Comparison", key=f"load_details_{product_id}"):
+                        st.session_state[details_key] = True
                         
-                        # Display price history chart
-                        view_mode = st.radio(
-                            "Chart Type",
-                            options=["line", "area", "bar", "candlestick"],
-                            index=0,
-                            horizontal=True
+                        stats_df, gauge_fig, comparison_fig = _cached_detail_figures(
+                            price_history, product_id, product['name'], cache_key
                         )
                         
-                        fig = create_price_history_chart(price_history, product['name'], view_mode)
-                        st.plotly_chart(fig, use_container_width=True)
-                        
                         # Display price statistics
                         st.markdown("### Price Statistics")
-                        stats_df = create_price_statistics_table(price_history)
                         if not stats_df.empty:
-                            st.dataframe(stats_df, use_container_width=True)
+                            st.dataframe(
+                                stats_df,
+                                column_config=PRICE_STATISTICS_COLUMN_CONFIG,
+                                use_container_width=True
+                            )
                         
                         # Display competitor comparison gauge
                         st.markdown("### Market Position")
-                        gauge_fig = create_price_comparison_gauge_chart(price_history, product['name'])
-                        st.plotly_chart(gauge_fig, use_container_width=True)
+                        st.plotly_chart(gauge_fig, use_container_width=True, config=STATIC_CHART_CONFIG)
                         
-                        # Display price vs competitors chart
+                        # Display price differences and the competitor matrix in one figure
                         st.markdown("### Price Difference Analysis")
-                        diff_fig = create_price_difference_chart(price_history, product['name'])
-                        st.plotly_chart(diff_fig, use_container_width=True)
-                        
-                        # Display competitor price matrix
-                        st.markdown("### Competitor Price Matrix")
-                        matrix_fig = create_competitor_price_matrix(price_history, product['name'])
-                        st.plotly_chart(matrix_fig, use_container_width=True)
-                    else:
-                        st.warning("No price history found for this product. Please run the scraper to collect data.")
+                        st.plotly_chart(comparison_fig, use_container_width=True)
+                else:
+                    st.warning("No price history found for this product. Please run the scraper to collect data.")
+            
+            with config_tab:
+                st.markdown("### Product Configuration Details")
+                
+                # Create columns
+                col1, col2 = st.columns(2)
                 
-                with config_tab:
-                    st.markdown("### Product Configuration Details")
+                with col1:
+                    st.markdown("#### Basic Information")
+                    st.markdown(f"**ID:** {product['id']}")
+                    st.markdown(f"**Name:** {product['name']}")
+                    st.markdown(f"**URL:** {product['our_url']}")
+                    st.markdown(f"**Price Selector:** `{product['our_price_selector']}`")
                     
-                    # Create columns
-                    col1, col2 = st.columns(2)
+                    if 'our_name_selector' in product and product['our_name_selector']:
+                        st.markdown(f"**Name Selector:** `{product['our_name_selector']}`")
                     
-                    with col1:
-                        st.markdown("#### Basic Information")
-                        st.markdown(f"**ID:** {product['id']}")
-                        st.markdown(f"**Name:** {product['name']}")
-                        st.markdown(f"**URL:** {product['our_url']}")
-                        st.markdown(f"**Price Selector:** `{product['our_price_selector']}`")
-                        
-                        if 'our_name_selector' in product and product['our_name_selector']:
-                            st.markdown(f"**Name Selector:** `{product['our_name_selector']}`")
-                        
-                        # Price thresholds
-                        st.markdown("#### Price Thresholds")
-                        min_threshold = product.get('min_price_threshold', "Not set (using global)")
-                        max_threshold = product.get('max_price_threshold', "Not set (using global)")
-                        st.markdown(f"**Min Threshold:** {min_threshold}€")
-                        st.markdown(f"**Max Threshold:** {max_threshold}€")
-                        
-                        # Test selectors for our product
-                        st.markdown("#### Test Our Selectors")
-                        test_cols = st.columns(2)
-                        with test_cols[0]:
-                            if st.button("Test Our Name Selector"):
-                                with st.spinner("Testing..."):
-                                    name_selector = product.get('our_name_selector')
-                                    if name_selector:
-                                        result = test_scrape(product['our_url'], None, name_selector)
-                                        if result and 'name' in result:
-                                            st.success(f"Found name: {result['name']}")
-                                        else:
-                                            st.error(f"Failed to find name: {result.get('error', 'Unknown error')}")
-                                    else:
-                                        st.warning("No name selector defined")
-                        
-                        with test_cols[1]:
-                            if st.button("Test Our Price Selector"):
-                                with st.spinner("Testing..."):
-                                    result = test_scrape(product['our_url'], product['our_price_selector'])
-                                    if result and 'price' in result:
-                                        st.success(f"Found price: {result['price']}")
+                    # Price thresholds
+                    st.markdown("#### Price Thresholds")
+                    min_threshold = product.get('min_price_threshold', "Not set (using global)")
+                    max_threshold = product.get('max_price_threshold', "Not set (using global)")
+                    st.markdown(f"**Min Threshold:** {min_threshold}€")
+                    st.markdown(f"**Max Threshold:** {max_threshold}€")
+                    
+                    # Test selectors for our product
+                    st.markdown("#### Test Our Selectors")
+                    test_cols = st.columns(2)
+                    with test_cols[0]:
+                        if st.button("Test Our Name Selector"):
+                            with st.spinner("Testing..."):
+                                name_selector = product.get('our_name_selector')
+                                if name_selector:
+                                    result = _cached_test_scrape(product['our_url'], None, name_selector)
+                                    if result and 'name' in result:
+                                        st.success(f"Found name: {result['name']}")
                                     else:
-                                        st.error(f"Failed to find price: {result.get('error', 'Unknown error')}")
+                                        st.error(f"Failed to find name: {result.get('error', 'Unknown error')}")
+                                else:
+                                    st.warning("No name selector defined")
                     
-                    with col2:
-                        st.markdown("#### Competitor Information")
+                    with test_cols[1]:
+                        if st.button("Test Our Price Selector"):
+                            with st.spinner("Testing..."):
+                                result = _cached_test_scrape(product['our_url'], product['our_price_selector'])
+                                if result and 'price' in result:
+                                    st.success(f"Found price: {result['price']}")
+                                else:
+                                    st.error(f"Failed to find price: {result.get('error', 'Unknown error')}")
+                
+                with col2:
+                    st.markdown("#### Competitor Information")
+                    
+                    # Get competitor URLs
+                    competitors = product.get('competitors', [])
+                    
+                    if competitors:
+                        st.markdown(f"Found {len(competitors)} competitors")
                         
-                        # Get competitor URLs
-                        competitor_urls = product.get('competitor_urls', {})
-                        competitor_selectors = product.get('competitor_selectors', {})
+                        # Test every competitor's selectors with the pages fetched in parallel
+                        if st.button("Test All Competitors", key=f"test_all_competitors_{product_id}"):
+                            with st.spinner("Testing..."):
+                                results = _cached_test_scrape_many(tuple(
+                                    (comp['url'], comp['price_selector'], comp['name_selector'])
+                                    for comp in competitors
+                                ))
+                            
+                            for idx, result in enumerate(results):
+                                if result and result.get('price') is not None:
+                                    found_name = f" ({result['name']})" if result.get('name') else ""
+                                    st.success(f"Competitor {idx+1}: found price {result['price']}{found_name}")
+                                else:
+                                    st.error(f"Competitor {idx+1}: failed to find price: {(result or {}).get('error', 'Unknown error')}")
                         
-                        if competitor_urls:
-                            st.markdown(f"Found {len(competitor_urls)} competitors")
+                        # Display each competitor
+                        for idx, comp in enumerate(competitors):
+                            comp_id = comp['id']
+                            comp_url = comp['url']
+                            name_selector = comp['name_selector']
+                            price_selector = comp['price_selector']
                             
-                            # Display each competitor
-                            for idx, (comp_id, comp_url) in enumerate(competitor_urls.items()):
-                                
-                                st.markdown(f"**Competitor {idx+1}**")
-                                st.markdown(f"URL: {comp_url}")
-                                
-                                # Handle different formats of competitor selectors
-                                name_selector = "Not set"
-                                price_selector = "Not set"
-                                
-                                # Try to get selectors from different formats
-                                if isinstance(competitor_selectors, dict):
-                                    # Check if comp_id is in the dict
-                                    if comp_id in competitor_selectors:
-                                        selectors = competitor_selectors[comp_id]
-                                        if isinstance(selectors, dict):
-                                            name_selector = selectors.get('name', 'Not set')
-                                            price_selector = selectors.get('price', 'Not set')
-                                        elif isinstance(selectors, list) and len(selectors) >= 2:
-                                            name_selector = selectors[0]
-                                            price_selector = selectors[1]
-                                    # Try index-based access if numeric
-                                    elif comp_id.isdigit() and int(comp_id) < len(competitor_selectors):
-                                        idx_selectors = list(competitor_selectors.values())[int(comp_id)]
-                                        if isinstance(idx_selectors, dict):
-                                            name_selector = idx_selectors.get('name', 'Not set')
-                                            price_selector = idx_selectors.get('price', 'Not set')
-                                # List of lists format [[name1, price1], [name2, price2]]
-                                elif isinstance(competitor_selectors, list) and idx < len(competitor_selectors):
-                                    idx_selectors = competitor_selectors[idx]
-                                    if isinstance(idx_selectors, list) and len(idx_selectors) >= 2:
-                                        name_selector = idx_selectors[0]
-                                        price_selector = idx_selectors[1]
-                                    elif isinstance(idx_selectors, dict):
-                                        name_selector = idx_selectors.get('name', 'Not set')
-                                        price_selector = idx_selectors.get('price', 'Not set')
-                                        
-                                st.markdown(f"Name Selector: `{name_selector}`")
-                                st.markdown(f"Price Selector: `{price_selector}`")
-                                
-                                # Add test buttons
-                                test_cols = st.columns(2)
-                                with test_cols[0]:
-                                    if st.button(f"Test Name {idx+1}", key=f"test_name_{comp_id}"):
-                                        from scraper import test_scrape
-                                        result = test_scrape(comp_url, None, name_selector)
-                                        if result and result.get('name'):
-                                            st.success(f"Found: {result['name']}")
-                                        else:
-                                            st.error("Failed to find element with selector")
-                                        
-                                with test_cols[1]:
-                                    if st.button(f"Test Price {idx+1}", key=f"test_price_{comp_id}"):
-                                        from scraper import test_scrape
-                                        result = test_scrape(comp_url, price_selector)
-                                        if result and result.get('price') is not None:
-                                            st.success(f"Found price: {result['price']}")
-                                        else:
-                                            st.error("Failed to find price with selector")
-            else:
-                st.error("Could not retrieve detailed product information.")
-            
-        # Display the price history chart
-        # ... (rest of the price history display)
+                            # One markdown element per competitor instead of four
+                            st.markdown("\n\n".join([
+                                f"**Competitor {idx+1}**",
+                                f"URL: {comp_url}",
+                                f"Name Selector: `{name_selector}`",
+                                f"Price Selector: `{price_selector}`"
+                            ]))
+                            
+                            # Add test buttons
+                            test_cols = st.columns(2)
+                            with test_cols[0]:
+                                if st.button(f"Test Name {idx+1}", key=f"test_name_{comp_id}"):
+                                    result = _cached_test_scrape(comp_url, None, name_selector)
+                                    if result and result.get('name'):
+                                        st.success(f"Found: {result['name']}")
+                                    else:
+                                        st.error("Failed to find element with selector")
+                                    
+                            with test_cols[1]:
+                                if st.button(f"Test Price {idx+1}", key=f"test_price_{comp_id}"):
+                                    result = _cached_test_scrape(comp_url, price_selector)
+                                    if result and result.get('price') is not None:
+                                        st.success(f"Found price: {result['price']}")
+                                    else:
+                                        st.error("Failed to find price with selector")
+        else:
+            st.error("Could not retrieve detailed product information.")
+        
+    # Display the price history chart
+    # ... (rest of the price history display)
+
+
+# Column headers of the batch import Excel template
+TEMPLATE_HEADERS = [
+    "product_name", "our_url", "our_name_selector", "our_price_selector",
+    "competitor1_url", "competitor1_name_selector", "competitor1_price_selector",
+    "competitor2_url", "competitor2_name_selector", "competitor2_price_selector",
+    "competitor3_url", "competitor3_name_selector", "competitor3_price_selector",
+    "min_price_threshold", "max_price_threshold"
+]
+
+# Widget labels and keys for the competitor inputs of the add product form
+COMPETITOR_FORM_FIELDS = [
+    (
+        f"#### Competitor {i+1}",
+        (f"Competitor {i+1} URL", f"comp_url_{i}"),
+        (f"Competitor {i+1} Name Selector", f"comp_name_{i}"),
+        (f"Competitor {i+1} Price Selector", f"comp_price_{i}")
+    )
+    for i in range(5)
+]
+
+# Columns read from an uploaded import file (the template plus competitors 4 and 5)
+IMPORT_COLUMNS = frozenset(TEMPLATE_HEADERS).union(
+    f"competitor{i}_{field}" for i in range(4, 6) for field in ("url", "name_selector", "price_selector")
+)
+
+@st.cache_data(show_spinner=False)
+def _read_import_excel(file_bytes):
+    """
+    Parse an uploaded batch import Excel file
+    
+    Args:
+        file_bytes (bytes): Contents of the uploaded .xlsx file
+    
+    Returns:
+        DataFrame: Known import columns as strings, with numeric price thresholds
+    """
+    df = pd.read_excel(
+        BytesIO(file_bytes),
+        engine='openpyxl',
+        dtype=str,
+        keep_default_na=False,
+        usecols=lambda col: col in IMPORT_COLUMNS
+    )
+    
+    # Convert the thresholds in one vectorized pass (empty cells become NaN)
+    for col in ['min_price_threshold', 'max_price_threshold']:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    
+    return df
+
+@st.cache_data(show_spinner=False)
+def _template_xlsx_bytes():
+    """Build the batch import Excel template once and return it as bytes"""
+    # Create a workbook with a template
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Products"
+    
+    # Add headers
+    for col_num, header in enumerate(TEMPLATE_HEADERS, 1):
+        ws.cell(row=1, column=col_num, value=header)
+    
+    # Add a sample row
+    sample_data = [
+        "Sample Product", "https://example.com/product", "#product-name", ".product-price",
+        "https://competitor1.com/product", "#product-title", ".price",
+        "https://competitor2.com/product", ".product-name", "#price",
+        "", "", "",
+        "-5", "15"
+    ]
+    
+    for col_num, value in enumerate(sample_data, 1):
+        ws.cell(row=2, column=col_num, value=value)
+    
+    # Save to a BytesIO object
+    excel_data = BytesIO()
+    wb.save(excel_data)
+    return excel_data.getvalue()
 
 # Add Product Page
 def add_product_page():
@@ -343,33 +894,38 @@ def add_product_page():
             st.markdown("### Competitor URLs (Optional)")
             st.markdown("Add up to 5 competitors to compare prices with.")
             
-            competitor_urls = {}
-            competitor_selectors = {}
+            # Every competitor's fields are always rendered; values are only read on submit
+            competitor_inputs = []
             
-            for i in range(5):
-                st.markdown(f"#### Competitor {i+1}")
+            for header, (url_label, url_key), (name_label, name_key), (price_label, price_key) in COMPETITOR_FORM_FIELDS:
+                st.markdown(header)
                 comp_cols = st.columns(2)
                 
                 with comp_cols[0]:
-                    comp_url = st.text_input(f"Competitor {i+1} URL", key=f"comp_url_{i}")
+                    comp_url = st.text_input(url_label, key=url_key)
                 
-                if comp_url:
-                    competitor_urls[str(i)] = comp_url
-                    
-                    with comp_cols[1]:
-                        comp_name_selector = st.text_input(f"Competitor {i+1} Name Selector", key=f"comp_name_{i}")
-                        comp_price_selector = st.text_input(f"Competitor {i+1} Price Selector", key=f"comp_price_{i}")
-                    
-                    if comp_price_selector:
-                        competitor_selectors[str(i)] = {
-                            "name": comp_name_selector,
-                            "price": comp_price_selector
-                        }
+                with comp_cols[1]:
+                    comp_name_selector = st.text_input(name_label, key=name_key)
+                    comp_price_selector = st.text_input(price_label, key=price_key)
+                
+                competitor_inputs.append((comp_url, comp_name_selector, comp_price_selector))
             
             # Submit button
             submit = st.form_submit_button("Add Product")
             
             if submit:
+                # Collect the competitors that have a URL
+                competitor_urls = {}
+                competitor_selectors = {}
+                for i, (comp_url, comp_name_selector, comp_price_selector) in enumerate(competitor_inputs):
+                    if comp_url:
+                        competitor_urls[str(i)] = comp_url
+                        if comp_price_selector:
+                            competitor_selectors[str(i)] = {
+                                "name": comp_name_selector,
+                                "price": comp_price_selector
+                            }
+                
                 try:
                     # Add the product to the database
                     product_id = add_product(
@@ -383,6 +939,8 @@ def add_product_page():
                         max_price_threshold=max_price_threshold
                     )
                     
+                    _clear_products()
+                    _clear_latest_prices()
                     st.success(f"Product '{name}' added successfully with ID {product_id}!")
                     
                     # Ask if user wants to test selectors
@@ -398,7 +956,7 @@ def add_product_page():
             if st.button("Test Our Price Selector"):
                 if our_url and our_price_selector:
                     with st.spinner("Testing price selector..."):
-                        result = test_scrape(our_url, our_price_selector)
+                        result = _cached_test_scrape(our_url, our_price_selector)
                         if result and 'price' in result and result['price'] is not None:
                             st.success(f"Successfully found price: {result['price']}")
                         else:
@@ -410,7 +968,7 @@ def add_product_page():
             if st.button("Test Our Name Selector"):
                 if our_url and our_name_selector:
                     with st.spinner("Testing name selector..."):
-                        result = test_scrape(our_url, None, our_name_selector)
+                        result = _cached_test_scrape(our_url, None, our_name_selector)
                         if result and 'name' in result:
                             st.success(f"Successfully found name: {result['name']}")
                         else:
@@ -425,59 +983,20 @@ def add_product_page():
         """)
         
         # Add a button to download the template
-        # from utils.excel_importer import generate_template_excel
-        if st.button("Download Template Excel"):
-            # Generate template Excel
-            import pandas as pd
-            from openpyxl import Workbook
-            from io import BytesIO
-            
-            # Create a workbook with a template
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Products"
-            
-            # Add headers
-            headers = [
-                "product_name", "our_url", "our_name_selector", "our_price_selector",
-                "competitor1_url", "competitor1_name_selector", "competitor1_price_selector",
-                "competitor2_url", "competitor2_name_selector", "competitor2_price_selector",
-                "competitor3_url", "competitor3_name_selector", "competitor3_price_selector",
-                "min_price_threshold", "max_price_threshold"
-            ]
-            
-            for col_num, header in enumerate(headers, 1):
-                ws.cell(row=1, column=col_num, value=header)
-            
-            # Add a sample row
-            sample_data = [
-                "Sample Product", "https://example.com/product", "#product-name", ".product-price",
-                "https://competitor1.com/product", "#product-title", ".price",
-                "https://competitor2.com/product", ".product-name", "#price",
-                "", "", "",
-                "-5", "15"
-            ]
-            
-            for col_num, value in enumerate(sample_data, 1):
-                ws.cell(row=2, column=col_num, value=value)
-            
-            # Save to a BytesIO object
-            excel_data = BytesIO()
-            wb.save(excel_data)
-            excel_data.seek(0)
-            
-            # Create a download link
-            b64 = base64.b64encode(excel_data.read()).decode()
-            href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="product_import_template.xlsx">Download Excel Template</a>'
-            st.markdown(href, unsafe_allow_html=True)
+        st.download_button(
+            label="Download Excel Template",
+            data=_template_xlsx_bytes(),
+            file_name="product_import_template.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
         
         # Upload Excel file
-        uploaded_file = st.file_uploader("Upload Excel file", type=["xlsx", "xls"])
+        uploaded_file = st.file_uploader("Upload Excel file", type=["xlsx"])
         
         if uploaded_file:
             try:
                 # Process the Excel file
-                df = pd.read_excel(uploaded_file)
+                df = _read_import_excel(uploaded_file.getvalue())
                 
                 if 'product_name' not in df.columns or 'our_url' not in df.columns or 'our_price_selector' not in df.columns:
                     st.error("Excel file must contain at least 'product_name', 'our_url', and 'our_price_selector' columns.")
@@ -489,80 +1008,102 @@ def add_product_page():
                     if st.button("Import Products"):
                         imported = 0
                         errors = 0
+                        products = []
+                        
+                        # Competitor column names, up to 5 competitors
+                        competitor_columns = [
+                            (f"competitor{i}_url", f"competitor{i}_name_selector", f"competitor{i}_price_selector")
+                            for i in range(1, 6)
+                        ]
                         
-                        for _, row in df.iterrows():
+                        # Replace NaN with None once so the rows can be checked with plain truthiness
+                        records = df.astype(object).where(pd.notna(df), None).to_dict('records')
+                        
+                        for row in records:
                             try:
-                                # Extract basic product data
-                                name = row['product_name']
-                                our_url = row['our_url']
-                                our_name_selector = row.get('our_name_selector', '')
-                                our_price_selector = row['our_price_selector']
-                                
-                                # Extract price thresholds
-                                min_price_threshold = float(row['min_price_threshold']) if pd.notna(row.get('min_price_threshold')) else None
-                                max_price_threshold = float(row['max_price_threshold']) if pd.notna(row.get('max_price_threshold')) else None
-                                
                                 # Extract competitor data
                                 competitor_urls = {}
                                 competitor_selectors = {}
                                 
-                                # Look for competitor columns
-                                for i in range(1, 6):  # Up to 5 competitors
-                                    comp_url_col = f"competitor{i}_url"
-                                    comp_name_sel_col = f"competitor{i}_name_selector"
-                                    comp_price_sel_col = f"competitor{i}_price_selector"
-                                    
-                                    if comp_url_col in row and pd.notna(row[comp_url_col]) and row[comp_url_col]:
-                                        comp_url = row[comp_url_col]
-                                        comp_name_sel = row.get(comp_name_sel_col, '')
-                                        comp_price_sel = row.get(comp_price_sel_col, '')
+                                for i, (url_col, name_sel_col, price_sel_col) in enumerate(competitor_columns):
+                                    comp_url = row.get(url_col)
+                                    if comp_url:
+                                        competitor_urls[str(i)] = comp_url
                                         
-                                        if comp_url:
-                                            competitor_urls[str(i-1)] = comp_url
-                                            
-                                            if comp_price_sel:
-                                                competitor_selectors[str(i-1)] = {
-                                                    "name": comp_name_sel,
-                                                    "price": comp_price_sel
-                                                }
-                                
-                                # Add the product
-                                product_id = add_product(
-                                    name=name,
-                                    our_url=our_url,
-                                    our_name_selector=our_name_selector,
-                                    our_price_selector=our_price_selector,
-                                    competitor_urls=competitor_urls,
-                                    competitor_selectors=competitor_selectors,
-                                    min_price_threshold=min_price_threshold,
-                                    max_price_threshold=max_price_threshold
-                                )
+                                        comp_price_sel = row.get(price_sel_col)
+                                        if comp_price_sel:
+                                            competitor_selectors[str(i)] = {
+                                                "name": row.get(name_sel_col) or '',
+                                                "price": comp_price_sel
+                                            }
                                 
-                                imported += 1
+                                products.append({
+                                    "name": row['product_name'],
+                                    "our_url": row['our_url'],
+                                    "our_name_selector": row.get('our_name_selector') or '',
+                                    "our_price_selector": row['our_price_selector'],
+                                    "competitor_urls": competitor_urls,
+                                    "competitor_selectors": competitor_selectors,
+                                    "min_price_threshold": row.get('min_price_threshold'),
+                                    "max_price_threshold": row.get('max_price_threshold')
+                                })
                             except Exception as e:
                                 errors += 1
-                                st.error(f"Error importing row for '{row.get('product_name', 'Unknown')}': {str(e)}")
+                                st.error(f"Error importing row for '{row.get('product_name') or 'Unknown'}': {str(e)}")
+                        
+                        # Add all valid products in one transaction
+                        if products:
+                            try:
+                                imported = add_products_bulk(products)
+                            except Exception as e:
+                                errors += len(products)
+                                st.error(f"Error importing products: {str(e)}")
                         
                         if imported > 0:
+                            _clear_products()
+                            _clear_latest_prices()
                             st.success(f"Successfully imported {imported} products. {errors} errors occurred.")
                         else:
                             st.error(f"Failed to import any products. {errors} errors occurred.")
             except Exception as e:
                 st.error(f"Error processing Excel file: {str(e)}")
 
+def _pct_delta(new, old):
+    """
+    Difference between two prices, absolute and relative to the old price
+    
+    Args:
+        new (float): New price
+        old (float): Reference price
+    
+    Returns:
+        tuple: (difference, percentage difference; 0 when the reference price is not positive)
+    """
+    diff = new - old
+    return diff, (diff / old * 100) if old > 0 else 0
+
+# Headings and keys of the sections shown in the AI analysis details
+ANALYSIS_DETAIL_SECTIONS = [
+    ("Market Position Analysis", 'market_analysis'),
+    ("Price Trend Analysis", 'trend_analysis'),
+    ("Competitor Analysis", 'competitor_analysis'),
+    ("Recommendations", 'recommendation'),
+    ("Reasoning", 'reasoning')
+]
+
 # Price Analysis Page
 def price_analysis_page():
     st.title("🔍 Price Analysis")
     
     # Get products from database
-    products_df = get_products()
+    products_df = _cached_get_products()
     
     if products_df.empty:
         st.warning("No products found. Please add products first.")
         return
     
     # Create a selectbox for product selection
-    product_options = [(row['id'], row['name']) for _, row in products_df.iterrows()]
+    product_options = _cached_product_options()
     selected_product = st.selectbox(
         "Select Product",
         options=product_options,
@@ -577,7 +1118,7 @@ def price_analysis_page():
         st.markdown("### Analysis Settings")
         
         # Analysis period
-        settings = get_settings()
+        settings = _cached_get_settings()
         default_days = int(settings.get("analysis_period", 7))
         
         analysis_days = st.slider(
@@ -589,17 +1130,27 @@ def price_analysis_page():
             help="Number of days of price history to include in the analysis"
         )
         
+        force_refresh = st.checkbox(
+            "Force refresh",
+            help=f"Request a new analysis even if one was generated in the last {ANALYSIS_MAX_AGE_HOURS} hours"
+        )
+        
         # Run analysis button
         if st.button("Run AI Analysis", type="primary"):
             with st.spinner("Analyzing price data..."):
-                # Get price analysis
-                analysis = get_price_analysis(product_id, analysis_days)
+                # Fetch the price history once for both the analysis and the charts
+                price_history = _cached_price_histories((product_id,), analysis_days).get(product_id, pd.DataFrame())
+                
+                # Get price analysis (a recent stored one is reused)
+                analysis = _get_stored_price_analysis(product_id, analysis_days, price_history, force_refresh)
                 
                 if 'error' in analysis:
                     st.error(f"Analysis error: {analysis['error']}")
                 else:
                     # Display analysis results
                     st.markdown(f"### AI Price Analysis for {product_name}")
+                    if 'generated_at' in analysis:
+                        st.caption(f"Stored analysis generated at {analysis['generated_at']} UTC")
                     
                     # Create columns for key metrics
                     metric_cols = st.columns(3)
@@ -610,8 +1161,7 @@ def price_analysis_page():
                     
                     with metric_cols[1]:
                         avg_competitor = analysis.get('average_competitor_price', 0)
-                        diff = current_price - avg_competitor if avg_competitor > 0 else 0
-                        diff_pct = (diff / avg_competitor * 100) if avg_competitor > 0 else 0
+                        _, diff_pct = _pct_delta(current_price, avg_competitor)
                         st.metric("Avg. Competitor Price", f"€{avg_competitor:.2f}", delta=f"{diff_pct:.1f}%")
                     
                     with metric_cols[2]:
@@ -622,8 +1172,7 @@ def price_analysis_page():
                     # Show price suggestion
                     if 'suggested_price' in analysis and analysis['suggested_price'] is not None:
                         suggested_price = analysis['suggested_price']
-                        price_diff = suggested_price - current_price
-                        price_diff_pct = (price_diff / current_price * 100) if current_price > 0 else 0
+                        price_diff, price_diff_pct = _pct_delta(suggested_price, current_price)
                         
                         suggestion_container = st.container(border=True)
                         with suggestion_container:
@@ -648,53 +1197,161 @@ def price_analysis_page():
                                             notes=analysis.get('short_recommendation', 'AI suggestion')
                                         )
                                         
+                                        _cached_suggested_prices.clear()
+                                        _clear_latest_prices()
                                         st.success(f"Suggestion saved! Go to 'Price Management' to apply it.")
                     
                     # Analysis details
                     with st.expander("AI Analysis Details", expanded=True):
-                        # Display the analysis sections if available
-                        if 'market_analysis' in analysis and analysis['market_analysis']:
-                            st.markdown("#### Market Position Analysis")
-                            st.write(analysis['market_analysis'])
-                        
-                        if 'trend_analysis' in analysis and analysis['trend_analysis']:
-                            st.markdown("#### Price Trend Analysis")
-                            st.write(analysis['trend_analysis'])
-                        
-                        if 'competitor_analysis' in analysis and analysis['competitor_analysis']:
-                            st.markdown("#### Competitor Analysis")
-                            st.write(analysis['competitor_analysis'])
-                        
-                        if 'recommendation' in analysis and analysis['recommendation']:
-                            st.markdown("#### Recommendations")
-                            st.write(analysis['recommendation'])
-                        
-                        if 'reasoning' in analysis and analysis['reasoning']:
-                            st.markdown("#### Reasoning")
-                            st.write(analysis['reasoning'])
+                        # Display the available analysis sections as one markdown element
+                        sections = [
+                            f"#### {title}\n\n{analysis[key]}"
+                            for title, key in ANALYSIS_DETAIL_SECTIONS
+                            if analysis.get(key)
+                        ]
+                        if sections:
+                            st.markdown("\n\n".join(sections))
                     
                     # Price visualizations
                     st.markdown("### Price Comparison")
                     
-                    # Get price history for visualization
-                    price_history = get_price_history(product_id, analysis_days)
-                    
                     if not price_history.empty:
-                        # Create the price history chart
-                        fig = create_price_history_chart(price_history, product_name)
+                        # Charts only need rebuilding when new prices arrive
+                        cache_key = (len(price_history), price_history['timestamp'].max())
+                        fig, forecast_fig = _cached_analysis_charts(
+                            price_history, product_id, analysis_days, product_name, cache_key
+                        )
+                        
+                        # Display the price history chart
                         st.plotly_chart(fig, use_container_width=True)
                         
-                        # Create price trend forecast
+                        # Display price trend forecast
                         st.markdown("### Price Trend Forecast")
-                        forecast_fig = create_price_trend_forecast(price_history, product_name)
                         st.plotly_chart(forecast_fig, use_container_width=True)
                     else:
                         st.warning("No price history data available for visualization.")
 
+@st.fragment
+def _suggestion_editor():
+    """
+    Render the individual suggestion editor of the price management page
+    
+    Runs as a fragment so selecting a suggestion only reruns the editor; applying, updating or
+    deleting one reruns the whole page so the suggestions table stays in sync.
+    """
+    st.markdown("#### Manage Individual Suggestion")
+    
+    # Get price suggestions (re-read from the cache on every fragment rerun)
+    suggestions_df = _cached_suggested_prices()
+    if suggestions_df.empty:
+        st.info("No price suggestions left to manage.")
+        return
+    
+    # Price differences for every suggestion in one vectorized pass
+    current_prices = suggestions_df['current_price']
+    price_diffs = suggestions_df['suggested_price'] - current_prices
+    suggestions_df['price_diff_pct'] = np.where(
+        current_prices > 0, price_diffs / current_prices.where(current_prices > 0) * 100, 0.0
+    )
+    
+    # Index by ID so selecting a suggestion is a direct lookup
+    suggestions_by_id = suggestions_df.set_index('id', drop=False)
+    
+    # Create a selectbox for suggestion selection
+    # (labels are built with one vectorized string concat)
+    suggestion_labels = suggestions_df['product_name'].astype(str) + " (ID: " + suggestions_df['id'].astype(str) + ")"
+    suggestion_options = list(zip(suggestions_df['id'].tolist(), suggestion_labels.tolist()))
+    selected_suggestion = st.selectbox(
+        "Select Suggestion",
+        options=suggestion_options,
+        format_func=lambda x: f"{x[1]}"
+    )
+    
+    if selected_suggestion:
+        suggestion_id = selected_suggestion[0]
+        
+        # Get the suggestion details
+        suggestion = suggestions_by_id.loc[suggestion_id]
+        
+        # Display suggestion details
+        st.markdown(f"**Product:** {suggestion['product_name']}")
+        st.markdown(f"**Current Price:** €{suggestion['current_price']:.2f}")
+        
+        # Calculate price differences
+        suggested_price = suggestion['suggested_price'] if pd.notna(suggestion['suggested_price']) else None
+        if suggested_price:
+            st.markdown(f"**Suggested Price:** €{suggested_price:.2f} ({suggestion['price_diff_pct']:.1f}%)")
+        
+        # Create a form for updating the suggestion
+        with st.form(key=f"update_suggestion_{suggestion_id}"):
+            # Manual price input
+            manual_price = st.number_input(
+                "Manual Price Override (€)",
+                min_value=0.01,
+                value=float(suggested_price) if suggested_price else None,
+                format="%.2f",
+                help="Enter a manual price to override the AI suggestion"
+            )
+            
+            # Notes
+            notes = st.text_area("Notes", value=suggestion['notes'] if pd.notna(suggestion['notes']) else "")
+            
+            # Action buttons
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                apply_button = st.form_submit_button("Apply Suggestion")
+            
+            with col2:
+                update_button = st.form_submit_button("Update Manual Price")
+            
+            with col3:
+                delete_button = st.form_submit_button("Delete Suggestion")
+            
+            if apply_button:
+                # Update the suggestion as applied
+                update_suggested_price(
+                    suggestion_id=suggestion_id,
+                    is_applied=True,
+                    notes=notes
+                )
+                _cached_suggested_prices.clear()
+                _clear_latest_prices()
+                st.session_state['_price_management_message'] = "Suggestion applied!"
+                # Refresh the whole page so the suggestions table shows the change
+                st.rerun()
+            
+            if update_button:
+                # Update the suggestion with manual price
+                update_suggested_price(
+                    suggestion_id=suggestion_id,
+                    manual_price=manual_price,
+                    notes=notes
+                )
+                _cached_suggested_prices.clear()
+                _clear_latest_prices()
+                st.session_state['_price_management_message'] = "Manual price updated!"
+                # Refresh the whole page so the suggestions table shows the change
+                st.rerun()
+            
+            if delete_button:
+                # Delete the suggestion
+                delete_suggested_price(suggestion_id)
+                _cached_suggested_prices.clear()
+                _clear_latest_prices()
+                st.session_state['_price_management_message'] = "Suggestion deleted!"
+                # Refresh the whole page so the suggestions table shows the change
+                st.rerun()
+
 # Price Management Page
 def price_management_page():
     st.title("💰 Price Management")
     
+    # Confirm the action that triggered this rerun (set just before st.rerun())
+    message = st.session_state.pop('_price_management_message', None)
+    if message:
+        st.toast(message)
+    
     # Create tabs for different views
     suggestions_tab, export_tab = st.tabs(["Price Suggestions", "Export Prices"])
     
@@ -705,7 +1362,7 @@ def price_management_page():
         """)
         
         # Get price suggestions
-        suggestions_df = get_suggested_prices()
+        suggestions_df = _cached_suggested_prices()
         
         if suggestions_df.empty:
             st.info("No price suggestions available. Run AI analysis to get suggestions.")
@@ -718,11 +1375,10 @@ def price_management_page():
                 
                 if apply_all:
                     with st.spinner("Applying all suggestions..."):
-                        for idx, row in suggestions_df.iterrows():
-                            suggestion_id = row['id']
-                            update_suggested_price(suggestion_id, is_applied=True)
-                        
-                        st.success("All suggestions applied!")
+                        bulk_update_suggested_prices(suggestions_df['id'].tolist(), is_applied=True)
+                        _cached_suggested_prices.clear()
+                        _clear_latest_prices()
+                        st.session_state['_price_management_message'] = "All suggestions applied!"
                         # Refresh the page
                         st.rerun()
             
@@ -735,23 +1391,14 @@ def price_management_page():
             # Display the suggestions table
             st.markdown("#### Current Suggestions")
             
-            # Create a clean version of the DataFrame for display
-            display_df = suggestions_df[['id', 'product_name', 'current_price', 'suggested_price', 
-                                        'manual_price', 'source', 'timestamp', 'notes']].copy()
-            
-            # Format price columns
-            for col in ['current_price', 'suggested_price', 'manual_price']:
-                if col in display_df.columns:
-                    display_df[col] = display_df[col].apply(
-                        lambda x: f"€{x:.2f}" if pd.notna(x) else "N/A"
-                    )
-            
-            # Format timestamp
-            if 'timestamp' in display_df.columns:
-                display_df['timestamp'] = pd.to_datetime(display_df['timestamp']).dt.strftime('%Y-%m-%d %H:%M')
-            
-            # Rename columns
-            display_df = display_df.rename(columns={
+            # Downcast numeric columns to shrink the table sent to the browser,
+            # then rename (the cached frame already holds only the displayed columns)
+            display_df = suggestions_df.astype({
+                'id': 'int32',
+                'current_price': 'float32',
+                'suggested_price': 'float32',
+                'manual_price': 'float32'
+            }).rename(columns={
                 'id': 'ID',
                 'product_name': 'Product',
                 'current_price': 'Current Price',
@@ -762,91 +1409,20 @@ def price_management_page():
                 'notes': 'Notes'
             })
             
-            st.dataframe(display_df, use_container_width=True)
-            
-            # Individual suggestion management
-            st.markdown("#### Manage Individual Suggestion")
-            
-            # Create a selectbox for suggestion selection
-            suggestion_options = [(row['id'], f"{row['product_name']} (ID: {row['id']})") for _, row in suggestions_df.iterrows()]
-            selected_suggestion = st.selectbox(
-                "Select Suggestion",
-                options=suggestion_options,
-                format_func=lambda x: f"{x[1]}"
+            st.dataframe(
+                display_df,
+                column_config={
+                    'Current Price': st.column_config.NumberColumn('Current Price', format='€%.2f'),
+                    'Suggested Price': st.column_config.NumberColumn('Suggested Price', format='€%.2f'),
+                    'Manual Price': st.column_config.NumberColumn('Manual Price', format='€%.2f'),
+                    'Created': st.column_config.DatetimeColumn('Created', format='YYYY-MM-DD HH:mm')
+                },
+                use_container_width=True
             )
             
-            if selected_suggestion:
-                suggestion_id = selected_suggestion[0]
-                
-                # Get the suggestion details
-                suggestion = suggestions_df[suggestions_df['id'] == suggestion_id].iloc[0]
-                
-                # Display suggestion details
-                st.markdown(f"**Product:** {suggestion['product_name']}")
-                st.markdown(f"**Current Price:** €{suggestion['current_price']:.2f}")
-                
-                # Calculate price differences
-                suggested_price = suggestion['suggested_price'] if pd.notna(suggestion['suggested_price']) else None
-                if suggested_price:
-                    price_diff = suggested_price - suggestion['current_price']
-                    price_diff_pct = (price_diff / suggestion['current_price'] * 100) if suggestion['current_price'] > 0 else 0
-                    st.markdown(f"**Suggested Price:** €{suggested_price:.2f} ({price_diff_pct:.1f}%)")
-                
-                # Create a form for updating the suggestion
-                with st.form(key=f"update_suggestion_{suggestion_id}"):
-                    # Manual price input
-                    manual_price = st.number_input(
-                        "Manual Price Override (€)",
-                        min_value=0.01,
-                        value=float(suggested_price) if suggested_price else None,
-                        format="%.2f",
-                        help="Enter a manual price to override the AI suggestion"
-                    )
-                    
-                    # Notes
-                    notes = st.text_area("Notes", value=suggestion['notes'] if pd.notna(suggestion['notes']) else "")
-                    
-                    # Action buttons
-                    col1, col2, col3 = st.columns(3)
-                    
-                    with col1:
-                        apply_button = st.form_submit_button("Apply Suggestion")
-                    
-                    with col2:
-                        update_button = st.form_submit_button("Update Manual Price")
-                    
-                    with col3:
-                        delete_button = st.form_submit_button("Delete Suggestion")
-                    
-                    if apply_button:
-                        # Update the suggestion as applied
-                        update_suggested_price(
-                            suggestion_id=suggestion_id,
-                            is_applied=True,
-                            notes=notes
-                        )
-                        st.success("Suggestion applied!")
-                        # Refresh the page
-                        st.rerun()
-                    
-                    if update_button:
-                        # Update the suggestion with manual price
-                        update_suggested_price(
-                            suggestion_id=suggestion_id,
-                            manual_price=manual_price,
-                            notes=notes
-                        )
-                        st.success("Manual price updated!")
-                        # Refresh the page
-                        st.rerun()
-                    
-                    if delete_button:
-                        # Delete the suggestion
-                        delete_suggested_price(suggestion_id)
-                        st.success("Suggestion deleted!")
-                        # Refresh the page
-                        st.rerun()
-    
+            # Individual suggestion management
+            _suggestion_editor()
+
     with export_tab:
         st.markdown("""
         ### Export Prices
@@ -854,7 +1430,7 @@ def price_management_page():
         """)
         
         # Get the latest prices
-        latest_prices = get_latest_prices()
+        latest_prices = _cached_latest_prices()
         
         if latest_prices.empty:
             st.warning("No price data available to export.")
@@ -862,63 +1438,65 @@ def price_management_page():
             # Display a preview of the data
             st.markdown("#### Data Preview")
             
-            # Create a clean DataFrame for display
-            preview_df = latest_prices[['id', 'name', 'current_price', 'final_suggested_price']].copy()
-            
-            # Format price columns
-            for col in ['current_price', 'final_suggested_price']:
-                if col in preview_df.columns:
-                    preview_df[col] = preview_df[col].apply(
-                        lambda x: f"€{x:.2f}" if pd.notna(x) else "N/A"
-                    )
-            
-            # Rename columns
-            preview_df = preview_df.rename(columns={
+            # Downcast numeric columns to shrink the table sent to the browser,
+            # then rename (the cached frame already holds only the previewed columns)
+            preview_df = latest_prices.astype({
+                'id': 'int32',
+                'current_price': 'float32',
+                'final_suggested_price': 'float32'
+            }).rename(columns={
                 'id': 'ID',
                 'name': 'Product',
                 'current_price': 'Current Price',
                 'final_suggested_price': 'Suggested Price'
             })
             
-            st.dataframe(preview_df, use_container_width=True)
+            st.dataframe(
+                preview_df,
+                column_config={
+                    'Current Price': st.column_config.NumberColumn('Current Price', format='€%.2f'),
+                    'Suggested Price': st.column_config.NumberColumn('Suggested Price', format='€%.2f')
+                },
+                use_container_width=True
+            )
             
             # Export options
             st.markdown("#### Export Options")
             
             export_cols = st.columns(2)
             
+            export_timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            json_data = _cached_json_export()
+            csv_data = _cached_csv_export()
+            
             with export_cols[0]:
-                if st.button("Export to JSON"):
-                    # Export to JSON
-                    json_data = export_prices_to_json()
-                    
-                    # Create a download link
-                    b64 = base64.b64encode(json_data.encode()).decode()
-                    href = f'<a href="data:application/json;base64,{b64}" download="price_data_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.json">Download JSON</a>'
-                    st.markdown(href, unsafe_allow_html=True)
-                    
-                    # Display the JSON data
-                    st.code(json_data, language="json")
+                st.download_button(
+                    "Download JSON",
+                    data=json_data,
+                    file_name=f"price_data_{export_timestamp}.json",
+                    mime="application/json"
+                )
             
             with export_cols[1]:
-                if st.button("Export to CSV"):
-                    # Export to CSV
-                    csv_data = export_prices_to_csv()
-                    
-                    # Create a download link
-                    b64 = base64.b64encode(csv_data.encode()).decode()
-                    href = f'<a href="data:text/csv;base64,{b64}" download="price_data_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.csv">Download CSV</a>'
-                    st.markdown(href, unsafe_allow_html=True)
-                    
-                    # Display the CSV data preview
-                    st.code(csv_data[:500] + "..." if len(csv_data) > 500 else csv_data, language="text")
+                st.download_button(
+                    "Download CSV",
+                    data=csv_data,
+                    file_name=f"price_data_{export_timestamp}.csv",
+                    mime="text/csv"
+                )
+            
+            # Only render the raw export text on request
+            if st.checkbox("Show raw export data"):
+                st.code(json_data.decode(), language="json")
+                csv_text = csv_data.decode()
+                st.code(csv_text[:500] + "..." if len(csv_text) > 500 else csv_text, language="text")
 
 # Settings Page
 def settings_page():
     st.title("⚙️ Settings")
     
     # Get current settings
-    settings = get_settings()
+    settings = _cached_get_settings()
     
     # Create tabs for different settings
     scraper_tab, thresholds_tab, misc_tab = st.tabs(["Scraper Settings", "Price Thresholds", "Miscellaneous"])
@@ -928,7 +1506,7 @@ def settings_page():
         st.markdown("Configure automatic scraping of product prices.")
         
         # Get current scraper status
-        scheduler_status = get_scheduler_status()
+        scheduler_status = _cached_scheduler_status()
         
         # Display current status
         status_cols = st.columns(3)
@@ -970,11 +1548,13 @@ def settings_page():
             if submit:
                 # Update settings
                 update_settings(scraping_interval=interval_minutes)
+                _cached_get_settings.clear()
                 st.success("Scraper settings updated!")
                 
                 # Restart the scheduler with the new interval
                 stop_scheduler()
                 start_scheduler()
+                _cached_scheduler_status.clear()
                 st.info("Scheduler restarted with the new interval.")
         
         # Manual controls
@@ -988,6 +1568,7 @@ def settings_page():
                     st.warning("Scheduler is already running.")
                 else:
                     start_scheduler()
+                    _cached_scheduler_status.clear()
                     st.success("Scheduler started!")
                     # Refresh the page
                     st.rerun()
@@ -998,6 +1579,7 @@ def settings_page():
                     st.warning("Scheduler is not running.")
                 else:
                     stop_scheduler()
+                    _cached_scheduler_status.clear()
                     st.success("Scheduler stopped!")
                     # Refresh the page
                     st.rerun()
@@ -1006,6 +1588,10 @@ def settings_page():
             if st.button("Run Now"):
                 with st.spinner("Running scraper..."):
                     results = run_scraper_now()
+                    _clear_products()
+                    _cached_price_histories.clear()
+                    _clear_latest_prices()
+                    _cached_scheduler_status.clear()
                     st.success(f"Scraping completed: {results.get('scraped', 0)} products scraped, {results.get('errors', 0)} errors")
     
     with thresholds_tab:
@@ -1048,6 +1634,7 @@ def settings_page():
                     global_min_price_threshold=min_threshold,
                     global_max_price_threshold=max_threshold
                 )
+                _cached_get_settings.clear()
                 st.success("Price thresholds updated!")
         
         # Explanation
@@ -1088,6 +1675,7 @@ def settings_page():
             if submit:
                 # Update settings
                 update_settings(analysis_period=new_analysis_period)
+                _cached_get_settings.clear()
                 st.success("Settings updated!")
 
 # Multi-product Analysis Page
@@ -1099,12 +1687,15 @@ def multi_product_analysis_page():
     """)
     
     # Get all products
-    products_df = get_products()
+    products_df = _cached_get_products()
     
     if products_df.empty:
         st.warning("No products found. Please add products first.")
         return
     
+    # Map product ids to names once for the per-product charts below
+    id_to_name = dict(_cached_product_options())
+    
     # Selection mode options
     selection_mode = st.radio(
         "Analysis Mode", 
@@ -1119,7 +1710,7 @@ def multi_product_analysis_page():
         st.success(f"Analyzing all {len(selected_product_ids)} products")
     else:
         # Create a multiselect for choosing products
-        product_options = [(row['id'], row['name']) for _, row in products_df.iterrows()]
+        product_options = _cached_product_options()
         selected_options = st.multiselect(
             "Select Products to Analyze",
             options=product_options,
@@ -1156,293 +1747,208 @@ def multi_product_analysis_page():
     
     with col2:
         analyze_button = st.button("Analyze Products", type="primary")
+        force_refresh = st.checkbox(
+            "Force refresh",
+            help=f"Run the analysis again instead of reusing the previous result or a stored analysis from the last {ANALYSIS_MAX_AGE_HOURS} hours",
+            key="multi_force_refresh"
+        )
+    
+    # Only run the analysis when the button is clicked for a new selection (or a forced refresh)
+    analysis_key = (tuple(selected_product_ids), days)
     
-    if analyze_button:
+    if analyze_button and (force_refresh or st.session_state.get('analysis_key') != analysis_key):
         with st.spinner("Analyzing products..."):
-            st.subheader("AI Analysis Report")
-            
-            # Perform bulk analysis
             if len(selected_product_ids) > 1:
                 # For multiple products, use bulk analysis
-                analysis_results = get_bulk_analysis(days)
+                st.session_state['analysis_results'] = get_bulk_analysis(
+                    days,
+                    product_ids=selected_product_ids if selection_mode != "Analyze All Products" else None
+                )
+            else:
+                # For a single product, get its detailed analysis (from the same cached history as its charts)
+                product_id = selected_product_ids[0]
+                price_history = _cached_price_histories((product_id,), days).get(product_id, pd.DataFrame())
+                st.session_state['analysis_results'] = _get_stored_price_analysis(product_id, days, price_history, force_refresh)
+            st.session_state['analysis_key'] = analysis_key
+    
+    # Non-interactive bulk analysis through the OpenAI Batch API
+    _overnight_analysis_section(selected_product_ids, days, id_to_name)
+    
+    # Show the stored analysis while the selection is unchanged, without re-running it
+    if st.session_state.get('analysis_key') == analysis_key:
+        st.subheader("AI Analysis Report")
+        
+        if len(selected_product_ids) > 1:
+            analysis_results = st.session_state['analysis_results']
+            
+            if not analysis_results:
+                st.warning("No analysis data available for the selected products and time period.")
+                return
+            
+            # Materialize the results once for the insights, price comparison and data tabs
+            results_df = pd.DataFrame(analysis_results).reindex(columns=[
+                'product_name', 'current_price', 'average_competitor_price',
+                'lowest_competitor_price', 'highest_competitor_price',
+                'price_change_percentage', 'price_position', 'short_recommendation'
+            ])
+            
+            # Convert the numeric columns once (missing values count as 0 everywhere below)
+            numeric_columns = [
+                'current_price', 'average_competitor_price', 'lowest_competitor_price',
+                'highest_competitor_price', 'price_change_percentage'
+            ]
+            results_df[numeric_columns] = results_df[numeric_columns].apply(pd.to_numeric, errors='coerce').fillna(0)
+            
+            # Pick one view at a time so only the visible section builds its charts
+            view = st.radio(
+                "View",
+                ["Key Insights", "Price Comparison", "Price Trends", "Raw Data"],
+                horizontal=True,
+                label_visibility="collapsed",
+                key="multi_analysis_view"
+            )
+            
+            if view == "Key Insights":
+                # Create a summary of insights for all products
+                summary_cols = st.columns(3)
                 
-                # Filter for only selected products
-                analysis_results = [r for r in analysis_results if r['product_id'] in selected_product_ids]
+                # Calculate aggregate metrics
+                # Reduce the results as arrays instead of one Python pass per metric
+                price_changes = results_df['price_change_percentage'].to_numpy(dtype=float)
+                positions = results_df['price_position'].fillna('').to_numpy()
                 
-                if not analysis_results:
-                    st.warning("No analysis data available for the selected products and time period.")
-                    return
+                total_products = len(results_df)
+                products_with_price_changes = int((np.abs(price_changes) > 0.5).sum())
+                avg_price_change = float(price_changes.mean())
+                products_above_market = int((positions == 'above market').sum())
+                products_below_market = int((positions == 'below market').sum())
+                products_at_market = total_products - products_above_market - products_below_market
                 
-                # Extract key insights
-                insights_tab, price_comp_tab, trends_tab, data_tab = st.tabs([
-                    "Key Insights", "Price Comparison", "Price Trends", "Raw Data"
-                ])
+                with summary_cols[0]:
+                    st.metric("Products Analyzed", total_products)
+                    st.metric("Products with Price Changes", products_with_price_changes)
                 
-                with insights_tab:
-                    # Create a summary of insights for all products
-                    summary_cols = st.columns(3)
-                    
-                    # Calculate aggregate metrics
-                    total_products = len(analysis_results)
-                    products_with_price_changes = sum(1 for r in analysis_results if abs(r.get('price_change_percentage', 0)) > 0.5)
-                    avg_price_change = np.mean([r.get('price_change_percentage', 0) for r in analysis_results])
-                    products_above_market = sum(1 for r in analysis_results if r.get('price_position', '') == 'above market')
-                    products_below_market = sum(1 for r in analysis_results if r.get('price_position', '') == 'below market')
-                    products_at_market = total_products - products_above_market - products_below_market
+                with summary_cols[1]:
+                    st.metric("Average Price Change", f"{avg_price_change:.2f}%", 
+                             delta=f"{avg_price_change:.2f}%" if abs(avg_price_change) > 0.5 else None)
                     
-                    with summary_cols[0]:
-                        st.metric("Products Analyzed", total_products)
-                        st.metric("Products with Price Changes", products_with_price_changes)
-                    
-                    with summary_cols[1]:
-                        st.metric("Average Price Change", f"{avg_price_change:.2f}%", 
-                                 delta=f"{avg_price_change:.2f}%" if abs(avg_price_change) > 0.5 else None)
-                        
-                    with summary_cols[2]:
-                        st.metric("Products Above Market", products_above_market)
-                        st.metric("Products Below Market", products_below_market)
-                    
-                    # Show AI insights from bulk analysis
-                    st.subheader("AI Insights")
-                    
-                    for result in analysis_results:
-                        with st.expander(f"{result.get('product_name', 'Product')}", expanded=False):
-                            # Show AI recommendations
-                            if 'recommendation' in result:
-                                st.markdown(f"**AI Recommendation:** {result['recommendation']}")
-                            
-                            # Show reasoning
-                            if 'reasoning' in result:
-                                st.markdown(f"**Analysis:** {result['reasoning']}")
-                            
-                            # Show any tips
-                            if 'tips' in result:
-                                st.markdown(f"**Tips:** {result['tips']}")
+                with summary_cols[2]:
+                    st.metric("Products Above Market", products_above_market)
+                    st.metric("Products Below Market", products_below_market)
                 
-                with price_comp_tab:
-                    # Create a comparative price positions chart
-                    pos_data = []
-                    for result in analysis_results:
-                        # Extract data
-                        product_name = result.get('product_name', 'Unknown')
-                        our_price = result.get('current_price', 0)
-                        avg_competitor = result.get('average_competitor_price', 0)
-                        min_competitor = result.get('lowest_competitor_price', 0)
-                        max_competitor = result.get('highest_competitor_price', 0)
-                        
-                        # Add to data list
-                        pos_data.append({
-                            'product': product_name,
-                            'our_price': our_price,
-                            'average_competitor': avg_competitor,
-                            'lowest_competitor': min_competitor,
-                            'highest_competitor': max_competitor,
-                            'price_difference_pct': ((our_price - avg_competitor) / avg_competitor * 100) if avg_competitor else 0
-                        })
-                    
-                    pos_df = pd.DataFrame(pos_data)
-                    
-                    if not pos_df.empty:
-                        # Sort by price difference
-                        pos_df = pos_df.sort_values('price_difference_pct')
-                        
-                        # Create the chart
-                        fig = go.Figure()
-                        
-                        # Add trace for our price
-                        fig.add_trace(go.Bar(
-                            y=pos_df['product'],
-                            x=pos_df['our_price'],
-                            name='Our Price',
-                            orientation='h',
-                            marker=dict(color='rgba(58, 71, 80, 0.8)')
-                        ))
-                        
-                        # Add range for competitor prices
-                        for i, row in pos_df.iterrows():
-                            fig.add_shape(
-                                type="line",
-                                x0=row['lowest_competitor'], 
-                                y0=i,
-                                x1=row['highest_competitor'],
-                                y1=i,
-                                line=dict(color="rgba(156, 165, 196, 1)", width=4),
-                                name="Competitor Range"
-                            )
-                            
-                            # Add marker for average
-                            fig.add_trace(go.Scatter(
-                                x=[row['average_competitor']],
-                                y=[row['product']],
-                                mode='markers',
-                                marker=dict(symbol='diamond', size=10, color='rgba(255, 0, 0, 0.7)'),
-                                name='Avg Competitor' if i == 0 else None,
-                                showlegend=(i == 0)
-                            ))
-                        
-                        # Update layout
-                        fig.update_layout(
-                            title='Our Prices vs Competitor Ranges',
-                            xaxis_title='Price (€)',
-                            yaxis_title='Product',
-                            barmode='group',
-                            height=max(400, len(pos_df) * 60),
-                            legend=dict(
-                                orientation="h",
-                                yanchor="bottom",
-                                y=1.02,
-                                xanchor="right",
-                                x=1
-                            ),
-                            margin=dict(l=20, r=20, t=50, b=50),
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Add explanation
-                        st.info("""
-                        **Chart explanation:**
-                        - **Blue bars** show our current prices
-                        - **Gray lines** represent the range of competitor prices (min to max)
-                        - **Red diamonds** show the average competitor price
-                        """)
+                # Show AI insights from bulk analysis
+                st.subheader("AI Insights")
                 
-                with trends_tab:
-                    # Create price trend mini-charts for each product
-                    st.subheader("Price Trends by Product")
-                    
-                    # Create a grid of small charts
-                    chart_cols = st.columns(2)
-                    
-                    for i, product_id in enumerate(selected_product_ids):
-                        # Get product name
-                        product_name = products_df[products_df['id'] == product_id]['name'].iloc[0]
-                        
-                        # Get price history
-                        price_history = get_price_history(product_id, days)
-                        
-                        if not price_history.empty:
-                            with chart_cols[i % 2]:
-                                st.markdown(f"#### {product_name}")
-                                fig = create_price_history_chart(price_history, product_name, view_mode="line")
-                                # Make chart smaller
-                                fig.update_layout(height=300, margin=dict(l=20, r=20, t=30, b=20))
-                                st.plotly_chart(fig, use_container_width=True)
+                for result in analysis_results:
+                    with st.expander(f"{result.get('product_name', 'Product')}", expanded=False):
+                        # Show the recommendation, reasoning and tips as one markdown element
+                        insights = [
+                            f"**{label}:** {result[key]}"
+                            for label, key in [("AI Recommendation", 'recommendation'), ("Analysis", 'reasoning'), ("Tips", 'tips')]
+                            if key in result
+                        ]
+                        if insights:
+                            st.markdown("\n\n".join(insights))
+            
+            elif view == "Price Comparison":
+                # Reuse the chart while the analysis results are unchanged
+                results_hash = int(pd.util.hash_pandas_object(results_df, index=False).sum())
+                fig = _cached_price_position_chart(results_df, results_hash)
                 
-                with data_tab:
-                    # Show raw data table
-                    st.subheader("Raw Analysis Data")
-                    
-                    # Create a clean table of results
-                    table_data = []
-                    for result in analysis_results:
-                        row = {
-                            'Product': result.get('product_name', 'Unknown'),
-                            'Our Price': f"€{result.get('current_price', 0):.2f}",
-                            'Avg Competitor': f"€{result.get('average_competitor_price', 0):.2f}",
-                            'Price Change': f"{result.get('price_change_percentage', 0):.2f}%",
-                            'Position': result.get('price_position', 'Unknown'),
-                            'Recommendation': result.get('short_recommendation', 'No recommendation')
-                        }
-                        table_data.append(row)
+                if fig is not None:
+                    st.plotly_chart(fig, use_container_width=True)
                     
-                    table_df = pd.DataFrame(table_data)
-                    st.dataframe(table_df, use_container_width=True)
+                    # Add explanation
+                    st.info("""
+                    **Chart explanation:**
+                    - **Blue bars** show our current prices
+                    - **Gray lines** represent the range of competitor prices (min to max)
+                    - **Red diamonds** show the average competitor price
+                    """)
+            
+            elif view == "Price Trends":
+                _multi_product_trends_fragment(selected_product_ids, days, id_to_name)
             
             else:
-                # For a single product, display detailed analysis
-                product_id = selected_product_ids[0]
-                product_name = products_df[products_df['id'] == product_id]['name'].iloc[0]
-                
-                st.subheader(f"Detailed Analysis for {product_name}")
-                
-                # Get single product analysis
-                analysis = get_price_analysis(product_id, days)
-                
-                if not analysis:
-                    st.warning("No analysis data available for this product and time period.")
-                    return
+                # Show raw data table
+                st.subheader("Raw Analysis Data")
                 
-                # Create tabs for different analysis views
-                analysis_tab, viz_tab, data_tab = st.tabs([
-                    "AI Analysis", "Visualizations", "Raw Data"
-                ])
+                # Create a clean table of results (numbers stay numeric so the columns sort correctly)
+                table_df = pd.DataFrame({
+                    'Product': results_df['product_name'].fillna('Unknown'),
+                    'Our Price': results_df['current_price'],
+                    'Avg Competitor': results_df['average_competitor_price'],
+                    'Price Change': results_df['price_change_percentage'],
+                    'Position': results_df['price_position'].fillna('Unknown'),
+                    'Recommendation': results_df['short_recommendation'].fillna('No recommendation')
+                })
+                st.dataframe(
+                    table_df,
+                    use_container_width=True,
+                    column_config={
+                        'Our Price': st.column_config.NumberColumn('Our Price', format='€%.2f'),
+                        'Avg Competitor': st.column_config.NumberColumn('Avg Competitor', format='€%.2f'),
+                        'Price Change': st.column_config.NumberColumn('Price Change', format='%.2f%%')
+                    }
+                )
+        
+        else:
+            # For a single product, display detailed analysis
+            product_id = selected_product_ids[0]
+            product_name = id_to_name[product_id]
+            
+            st.subheader(f"Detailed Analysis for {product_name}")
+            
+            analysis = st.session_state['analysis_results']
+            
+            if not analysis:
+                st.warning("No analysis data available for this product and time period.")
+                return
+            
+            # Pick one view at a time so the charts are only built when they are shown
+            view = st.radio(
+                "View",
+                ["AI Analysis", "Visualizations", "Raw Data"],
+                horizontal=True,
+                label_visibility="collapsed",
+                key="single_analysis_view"
+            )
+            
+            if view == "AI Analysis":
+                # Show current status metrics
+                metric_cols = st.columns(3)
                 
-                with analysis_tab:
-                    # Show current status metrics
-                    metric_cols = st.columns(3)
-                    
-                    with metric_cols[0]:
-                        st.metric("Current Price", f"€{analysis.get('current_price', 0):.2f}")
-                        
-                    with metric_cols[1]:
-                        price_change = analysis.get('price_change_percentage', 0)
-                        st.metric("Price Change", f"{price_change:.2f}%", 
-                                 delta=f"{price_change:.2f}%" if abs(price_change) > 0.5 else None)
-                        
-                    with metric_cols[2]:
-                        st.metric("Market Position", analysis.get('price_position', 'Unknown').title())
+                with metric_cols[0]:
+                    st.metric("Current Price", f"€{analysis.get('current_price', 0):.2f}")
                     
-                    # Show AI recommendation
-                    st.markdown("### AI Recommendation")
-                    st.info(analysis.get('recommendation', 'No recommendation available.'))
+                with metric_cols[1]:
+                    price_change = analysis.get('price_change_percentage', 0)
+                    st.metric("Price Change", f"{price_change:.2f}%", 
+                             delta=f"{price_change:.2f}%" if abs(price_change) > 0.5 else None)
                     
-                    # Show reasoning
-                    st.markdown("### Analysis")
-                    st.write(analysis.get('reasoning', 'No analysis available.'))
-                    
-                    # Show tips
-                    if 'tips' in analysis:
-                        st.markdown("### Tips")
-                        st.write(analysis['tips'])
+                with metric_cols[2]:
+                    st.metric("Market Position", analysis.get('price_position', 'Unknown').title())
                 
-                with viz_tab:
-                    # Get price history for visualization
-                    price_history = get_price_history(product_id, days)
-                    
-                    if not price_history.empty:
-                        # Price trend chart
-                        st.markdown("### Price Trend")
-                        fig = create_price_history_chart(price_history, product_name, view_mode="line")
-                        st.plotly_chart(fig, use_container_width=True)
-                        
-                        # Price comparison with competitors
-                        st.markdown("### Competitor Comparison")
-                        
-                        # Extract competitor data for the latest date
-                        latest_data = price_history.iloc[-1]
-                        our_price = latest_data['our_price']
-                        competitor_prices = latest_data['competitor_prices']
-                        
-                        # Create comparison chart
-                        if competitor_prices and isinstance(competitor_prices, dict):
-                            comp_data = {
-                                'Seller': ['Our Price'] + list(competitor_prices.keys()),
-                                'Price': [our_price] + list(competitor_prices.values())
-                            }
-                            comp_df = pd.DataFrame(comp_data)
-                            
-                            # Sort by price
-                            comp_df = comp_df.sort_values('Price')
-                            
-                            # Create bar chart
-                            fig = px.bar(
-                                comp_df, 
-                                x='Seller', 
-                                y='Price',
-                                color='Seller',
-                                color_discrete_map={'Our Price': 'rgba(58, 71, 80, 0.8)'},
-                                title="Current Price Comparison"
-                            )
-                            
-                            # Customize
-                            fig.update_layout(height=400)
-                            st.plotly_chart(fig, use_container_width=True)
+                # Show AI recommendation
+                st.markdown("### AI Recommendation")
+                st.info(analysis.get('recommendation', 'No recommendation available.'))
                 
-                with data_tab:
-                    # Show raw analysis data
-                    st.json(analysis)
-    
+                # Show reasoning
+                st.markdown("### Analysis")
+                st.write(analysis.get('reasoning', 'No analysis available.'))
+                
+                # Show tips
+                if 'tips' in analysis:
+                    st.markdown("### Tips")
+                    st.write(analysis['tips'])
+            
+            elif view == "Visualizations":
+                _single_product_charts_fragment(product_id, product_name, days)
+            
+            else:
+                # Show raw analysis data
+                st.json(analysis)
+
     # Add information about the feature
     with st.expander("About Multi-Product Analysis", expanded=False):
         st.markdown("""
@@ -1465,4 +1971,170 @@ def multi_product_analysis_page():
         - Use the "Last 7 Days" or "Last 14 Days" timeframes for the most relevant analysis
         - Compare products in the same category to identify category-specific pricing trends
         - Use this analysis before making bulk price adjustments
-        """)
\ No newline at end of file
+        """)
+
+@st.fragment
+def _multi_product_trends_fragment(selected_product_ids, days, id_to_name):
+    """
+    Render the price trends grid of the multi-product analysis
+    
+    Runs as a fragment so the grid can rerun without the rest of the page.
+    
+    Args:
+        selected_product_ids (list): Product IDs to chart
+        days (int): Analysis period in days
+        id_to_name (dict): Product name per product ID
+    """
+    # Create price trend mini-charts for each product
+    st.subheader("Price Trends by Product")
+    
+    # Fetch the price history of every selected product in one cached query
+    price_histories = _cached_price_histories(tuple(selected_product_ids), days)
+    
+    # Build every chart first (contiguous cache lookups), products without history are skipped
+    figures = []
+    for product_id in selected_product_ids:
+        price_history = price_histories.get(product_id, pd.DataFrame())
+        if not price_history.empty:
+            product_name = id_to_name[product_id]
+            cache_key = (len(price_history), price_history['timestamp'].max())
+            figures.append((product_name, _cached_history_chart(price_history, product_id, days, product_name, "line", cache_key, compact=True)))
+    
+    # Then lay them out in a grid of small charts
+    chart_cols = st.columns(2)
+    for i, (product_name, fig) in enumerate(figures):
+        with chart_cols[i % 2]:
+            st.markdown(f"#### {product_name}")
+            st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment
+def _single_product_charts_fragment(product_id, product_name, days):
+    """
+    Render the visualizations tab of a single-product analysis
+    
+    Runs as a fragment so the charts can rerun without the rest of the page.
+    
+    Args:
+        product_id (int): Product ID
+        product_name (str): Name of the product
+        days (int): Analysis period in days
+    """
+    # Get price history for visualization
+    price_history = _cached_price_histories((product_id,), days).get(product_id, pd.DataFrame())
+    
+    if not price_history.empty:
+        # Price trend chart
+        st.markdown("### Price Trend")
+        cache_key = (len(price_history), price_history['timestamp'].max())
+        fig = _cached_history_chart(price_history, product_id, days, product_name, "line", cache_key)
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Price comparison with competitors
+        st.markdown("### Competitor Comparison")
+        
+        # Extract competitor data for the latest date
+        latest_data = price_history.iloc[-1]
+        our_price = latest_data['our_price']
+        competitor_prices = latest_data['competitor_prices']
+        
+        # Create comparison chart
+        if competitor_prices and isinstance(competitor_prices, dict):
+            sellers = np.array(['Our Price'] + list(competitor_prices.keys()), dtype=object)
+            prices = pd.to_numeric([our_price] + list(competitor_prices.values()), errors='coerce').astype(np.float32)
+            
+            # Sort by price
+            order = np.argsort(prices, kind='stable')
+            sellers, prices = sellers[order], prices[order]
+            
+            # Create a single-trace bar chart, highlighting our price
+            bar_colors = np.where(sellers == 'Our Price', 'rgba(58, 71, 80, 0.8)', 'rgba(99, 110, 250, 0.8)')
+            fig = go.Figure(go.Bar(
+                x=sellers,
+                y=prices,
+                marker_color=bar_colors
+            ))
+            
+            # Customize
+            fig.update_layout(
+                title="Current Price Comparison",
+                xaxis_title='Seller',
+                yaxis_title='Price',
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+def _overnight_analysis_section(selected_product_ids, days, id_to_name):
+    """
+    Submit the selected products to the OpenAI Batch API and collect the results of earlier batches
+    
+    Args:
+        selected_product_ids (list): IDs of the selected products
+        days (int): Number of days of history to include
+        id_to_name (dict): Product names by ID
+    """
+    with st.expander("Overnight Bulk Analysis", expanded=False):
+        st.markdown(
+            "Submit the selected products as an OpenAI batch: it runs within 24 hours "
+            "at half the cost of an immediate analysis. Check back later to collect the results."
+        )
+        
+        if st.button("Schedule Overnight Bulk Analysis"):
+            with st.spinner("Submitting batch..."):
+                submission = submit_analysis_batch(selected_product_ids, days)
+            
+            if 'error' in submission:
+                st.error(submission['error'])
+            else:
+                st.success(f"Submitted {submission['product_count']} products (batch {submission['batch_id']})")
+        
+        batches = get_analysis_batches()
+        if not batches:
+            st.info("No batches submitted yet.")
+            return
+        
+        st.markdown("#### Batch Status")
+        st.dataframe(
+            pd.DataFrame({
+                'Batch': [batch['batch_id'] for batch in batches],
+                'Products': [len(batch['product_ids']) for batch in batches],
+                'Days': [batch['days'] for batch in batches],
+                'Status': [batch['status'] for batch in batches],
+                'Submitted': [batch['created_at'] for batch in batches]
+            }),
+            use_container_width=True
+        )
+        
+        selected_batch = st.selectbox(
+            "Batch",
+            [batch['batch_id'] for batch in batches],
+            key="overnight_batch_id"
+        )
+        
+        if st.button("Check Batch Status"):
+            with st.spinner("Checking batch..."):
+                st.session_state['overnight_batch_result'] = check_analysis_batch(selected_batch)
+        
+        batch_result = st.session_state.get('overnight_batch_result')
+        if not batch_result or batch_result.get('batch_id') != selected_batch:
+            return
+        
+        if 'error' in batch_result:
+            st.error(batch_result['error'])
+        elif batch_result['results'] is None:
+            st.info(f"Batch status: {batch_result['status']}")
+        else:
+            results = batch_result['results']
+            st.dataframe(
+                pd.DataFrame({
+                    'Product': [result.get('product_name', id_to_name.get(result.get('product_id'), 'Unknown')) for result in results],
+                    'Our Price': [result.get('current_price') for result in results],
+                    'Suggested Price': [result.get('suggested_price') for result in results],
+                    'Position': [result.get('price_position', 'Unknown') for result in results],
+                    'Recommendation': [result.get('short_recommendation') or result.get('error', '') for result in results]
+                }),
+                use_container_width=True,
+                column_config={
+                    'Our Price': st.column_config.NumberColumn('Our Price', format='€%.2f'),
+                    'Suggested Price': st.column_config.NumberColumn('Suggested Price', format='€%.2f')
+                }
+            )
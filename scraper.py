@@ -342,11 +342,7 @@ def scrape_all_products():
             competitor_prices = {}
             
             if competitor_urls and competitor_selectors:
-                # Identify the URL format - either dict, list, or string
-                if isinstance(competitor_urls, str):
-                    # Handle comma-separated string format
-                    competitor_urls = [url.strip() for url in competitor_urls.split(',') if url.strip()]
-                
+                # Identify the URL format - either dict or list (legacy comma-separated rows are migrated by init_db)
                 if isinstance(competitor_urls, list):
                     # List format - urls at idx 0, 1, 2, etc.
                     for idx, comp_url in enumerate(competitor_urls):
@@ -443,6 +439,26 @@ def test_scrape(url, price_selector, name_selector=None):
     """Test scraping a URL with given selectors"""
     return scrape_product(url, price_selector, name_selector)
 
+# Maximum number of selector tests fetched at the same time
+TEST_SCRAPE_WORKERS = 5
+
+def test_scrape_many(targets):
+    """
+    Test several URLs and selectors at once, fetching the pages concurrently
+    
+    Args:
+        targets (list): (url, price_selector, name_selector) tuples
+    
+    Returns:
+        list: Scrape results, in the same order as targets
+    """
+    if not targets:
+        return []
+    
+    # Each test waits on an HTTP request, so run them on a bounded thread pool
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(TEST_SCRAPE_WORKERS, len(targets))) as executor:
+        return list(executor.map(lambda target: test_scrape(*target), targets))
+
 # Scheduler functions
 
 def _run_scraper():
@@ -523,9 +539,10 @@ def get_scheduler_status():
     last_scrape = settings.get("last_scrape", "")
     
     if last_scrape and not scheduler_last_run:
+        # fromisoformat reads the stored '%Y-%m-%d %H:%M:%S' stamps (and ISO variants) without a format ladder
         try:
-            scheduler_last_run = datetime.datetime.strptime(last_scrape, '%Y-%m-%d %H:%M:%S')
-        except:
+            scheduler_last_run = datetime.datetime.fromisoformat(last_scrape)
+        except ValueError:
             pass
     
     # Calculate next run time if running